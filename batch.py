@@ -0,0 +1,83 @@
+import json
+import os
+import sys
+import time
+
+import checker
+from cdcl import CDCL
+from result import Result
+from utils import OPENERS, open_cnf, parse_cnf, silence_worker, to_sentence, worker_context
+
+
+def instances(source):
+    """
+    The instances of a directory (.cnf files, possibly compressed) or of a list file (one path per line),
+      largest file first so that the longest instances do not start last.
+    """
+    if os.path.isdir(source):
+        suffixes = tuple(".cnf" + ext for ext in ("", *OPENERS))
+        paths = [os.path.join(root, name) for root, _, names in os.walk(source)
+                 for name in names if name.endswith(suffixes)]
+    else:
+        directory = os.path.dirname(source)
+        with open(source) as f:
+            paths = [os.path.join(directory, line.strip()) for line in f
+                     if line.strip() and not line.startswith("#")]
+    return sorted(paths, key=lambda path: (-os.path.getsize(path), path))
+
+
+def solve_instance(path, budgets):
+    """
+    Solve one instance under the budgets of solve(), the time budget also covering parsing and preprocessing.
+    Returns its JSON Lines record.
+    """
+    start_time = time.time()
+    deadline = time.perf_counter() + budgets["time_limit"] if "time_limit" in budgets else None
+    record = {"file": path}
+    try:
+        with open_cnf(path) as f:
+            literals, offsets, num_vars = parse_cnf(f)
+        cdcl = CDCL(to_sentence(literals, offsets), num_vars, deadline=deadline)
+        if deadline is not None:
+            budgets = dict(budgets, time_limit=max(0.0, deadline - time.perf_counter()))
+        res = cdcl.solve(**budgets)
+        record["status"] = res.status
+        if res.status == Result.SAT and not checker.check(literals, offsets, res.model):
+            record["status"] = "WRONG"
+        if res.reason is not None:
+            record["reason"] = res.reason
+        record["conflicts"] = cdcl.conflicts
+    except MemoryError:
+        record["status"] = "MEMOUT"
+    except Exception as e:
+        record["status"] = "ERROR"
+        record["error"] = repr(e)
+    record["time"] = time.time() - start_time
+    return record
+
+
+def solve_batch(source, workers, budgets=None, output=None):
+    """
+    Solve the instances of source with a pool of workers started once, so the interpreter and imports
+      are only paid per worker. A record is streamed to output (stdout by default) as each instance completes.
+    Returns the number of records by status.
+    """
+    ctx = worker_context()
+    paths = instances(source)
+    out = sys.stdout if output is None else open(output, "w")
+    counts = {}
+    try:
+        with ctx.Pool(workers, initializer=silence_worker) as pool:
+            tasks = [(path, budgets or {}) for path in paths]
+            for record in pool.imap_unordered(_solve_task, tasks):
+                counts[record["status"]] = counts.get(record["status"], 0) + 1
+                out.write(json.dumps(record) + "\n")
+                out.flush()
+    finally:
+        if output is not None:
+            out.close()
+    return counts
+
+
+def _solve_task(task):
+    return solve_instance(*task)
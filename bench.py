@@ -0,0 +1,206 @@
+import argparse
+import concurrent.futures
+import csv
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+# Expected answer of the instances of each testset directory
+TIERS = {
+    "unsat": "UNSAT",
+    "sat": "SAT",
+    "large-sat": "SAT",
+}
+FIELDS = ["instance", "expected", "status", "verified", "solved",
+          "time", "conflicts", "decisions", "propagations"]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Run the testset, or compare two result files")
+    parser.add_argument("-d", "--testset", type=str, default="testset")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                        help="instances solved in parallel")
+    parser.add_argument("-t", "--timeout", type=float, default=300,
+                        help="seconds per instance")
+    parser.add_argument("-m", "--memory", type=int, default=4096,
+                        help="MB of address space per instance, 0 for no limit")
+    parser.add_argument("-o", "--output", type=str, default="bench.json",
+                        help="results file, CSV if it ends with .csv")
+    parser.add_argument("--large", action="store_true",
+                        help="also run the slow testset/large-sat tier")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"),
+                        help="compare two result files and flag regressions")
+    parser.add_argument("--slowdown", type=float, default=1.5,
+                        help="time ratio flagged as a regression by --compare")
+    parser.add_argument("--run-one", type=str, help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def instances(testset, large):
+    """
+    List the (instance, expected answer) pairs of the testset.
+    """
+    tiers = ["unsat", "sat"] + (["large-sat"] if large else [])
+    for tier in tiers:
+        directory = os.path.join(testset, tier)
+        for name in sorted(os.listdir(directory)):
+            yield os.path.join(directory, name), TIERS[tier]
+
+
+def run_one(path, memory):
+    """
+    Solve one instance in this process, limited to memory MB of address space,
+      and print its statistics as JSON on the last line.
+    The model of a SAT answer is checked against the parsed formula.
+    """
+    import checker
+    from cdcl import CDCL
+    from utils import open_cnf, parse_cnf, to_sentence
+
+    # Set once the shared libraries are loaded, so that the limit applies to solving
+    if memory > 0:
+        size = memory * (1 << 20)
+        resource.setrlimit(resource.RLIMIT_AS, (size, size))
+
+    stdout = sys.stdout
+    sys.stdout = open(os.devnull, "w")
+    try:
+        start_time = time.time()
+        with open_cnf(path) as f:
+            literals, offsets, num_vars = parse_cnf(f)
+        cdcl = CDCL(to_sentence(literals, offsets), num_vars)
+        res = cdcl.solve()
+        result = {
+            "status": res.status,
+            "verified": res.status != "SAT" or checker.check(literals, offsets, res.model),
+            "time": time.time() - start_time,
+            "conflicts": cdcl.conflicts,
+            "decisions": cdcl.total_decisions,
+            "propagations": cdcl.propagations,
+        }
+    except MemoryError:
+        result = {"status": "MEMOUT"}
+    sys.stdout = stdout
+    print(json.dumps(result))
+
+
+def run(path, expected, timeout, memory):
+    """
+    Solve one instance in a subprocess limited to timeout seconds and memory MB.
+    The subprocess sets its own memory limit: preexec_fn is not safe with the threads of the pool.
+    """
+    cmd = [sys.executable, os.path.abspath(__file__), "--run-one", path, "--memory", str(memory)]
+    start_time = time.time()
+    try:
+        proc = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+        if proc.returncode == 0:
+            result = json.loads(proc.stdout.strip().splitlines()[-1])
+        elif "MemoryError" in proc.stderr:
+            result = {"status": "MEMOUT"}
+        else:
+            result = {"status": "ERROR"}
+    except subprocess.TimeoutExpired:
+        result = {"status": "TIMEOUT"}
+    result.setdefault("time", time.time() - start_time)
+    result["instance"] = path
+    result["expected"] = expected
+    if result["status"] in ("SAT", "UNSAT") and result["status"] != expected:
+        result["status"] = "WRONG"
+    result["solved"] = result["status"] == expected and result.get("verified", False)
+    return result
+
+
+def par2(results, timeout):
+    """
+    Penalized average runtime: unsolved instances count twice the timeout.
+    """
+    if not results:
+        return 0.0
+    return sum(r["time"] if r["solved"] else 2 * timeout for r in results) / len(results)
+
+
+def save(results, timeout, path):
+    if path.endswith(".csv"):
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=FIELDS, extrasaction="ignore")
+            writer.writeheader()
+            writer.writerows(results)
+    else:
+        with open(path, "w") as f:
+            json.dump({"timeout": timeout, "par2": par2(results, timeout),
+                       "results": results}, f, indent=2)
+
+
+def load(path):
+    """
+    Returns (results, timeout) of a JSON or CSV results file. A CSV file does not record its timeout.
+    """
+    if path.endswith(".csv"):
+        with open(path, newline="") as f:
+            results = list(csv.DictReader(f))
+        for r in results:
+            r["solved"] = r["solved"] == "True"
+            r["time"] = float(r["time"])
+        return results, None
+    with open(path) as f:
+        data = json.load(f)
+    return data["results"], data["timeout"]
+
+
+def compare(old_path, new_path, slowdown):
+    """
+    Flag the instances no longer solved, or slower by more than the slowdown ratio (and 1 second).
+    Returns the number of regressions.
+    """
+    old, old_timeout = load(old_path)
+    new, new_timeout = load(new_path)
+    timeout = new_timeout or old_timeout or max(r["time"] for r in old + new)
+    old = {r["instance"]: r for r in old}
+    regressions = 0
+    for r in new:
+        o = old.get(r["instance"])
+        if o is None:
+            continue
+        if o["solved"] and not r["solved"]:
+            print(f"REGRESSION {r['instance']}: {r['status']}, was solved in {o['time']:.2f}s")
+            regressions += 1
+        elif o["solved"] and r["time"] > slowdown * o["time"] and r["time"] - o["time"] > 1:
+            print(f"REGRESSION {r['instance']}: {r['time']:.2f}s, was {o['time']:.2f}s")
+            regressions += 1
+        elif not o["solved"] and r["solved"]:
+            print(f"improved {r['instance']}: solved in {r['time']:.2f}s, was {o['status']}")
+    common = [r for r in new if r["instance"] in old]
+    print(f"PAR-2: {par2([old[r['instance']] for r in common], timeout):.2f} -> {par2(common, timeout):.2f},",
+          regressions, "regressions")
+    return regressions
+
+
+def main(args):
+    if args.run_one:
+        run_one(args.run_one, args.memory)
+        return 0
+    if args.compare:
+        return 1 if compare(*args.compare, args.slowdown) else 0
+
+    results = []
+    with concurrent.futures.ThreadPoolExecutor(args.jobs) as pool:
+        futures = [pool.submit(run, path, expected, args.timeout, args.memory)
+                   for path, expected in instances(args.testset, args.large)]
+        for future in concurrent.futures.as_completed(futures):
+            r = future.result()
+            results.append(r)
+            print(f"{r['instance']}: {r['status']} in {r['time']:.2f}s,",
+                  r.get("conflicts", "-"), "conflicts")
+    results.sort(key=lambda r: r["instance"])
+    save(results, args.timeout, args.output)
+    solved = sum(r["solved"] for r in results)
+    print(f"solved {solved} of {len(results)}, PAR-2 {par2(results, args.timeout):.2f}s, results in {args.output}")
+    return 0 if solved == len(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(parse_args()))
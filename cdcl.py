@@ -1,10 +1,14 @@
 import math
+import random
+import time
+
+import numpy as np
 
 import checker
 import preprocessor
 
-from clause import Clause
-from literal import Literals
+from clause import ACTIVITY, DELETED, FLAGS, GLUE, HEADER_SIZE, SIZE, SUBSUMING, USED, ClauseArena
+from literal import Literals, binary_reason, binary_reason_literal
 from watchtable import WatchTable
 from trail import Trail
 from decider import *
@@ -12,88 +16,315 @@ from params import *
 from mab import UCB
 from restarter import *
 from subsumption import SubsumptionEliminator
+from prober import Prober
+from proof import Proof
+from result import Result
+from stats import Statistics
 
 
 class CDCL:
-    def __init__(self, sentence, num_vars):
-        self.sentence = sentence
-        sentence, self.clauses_eliminated = preprocessor.preprocess(
-            sentence, num_vars)
+    """
+    CDCL solver, with an incremental interface in the style of IPASIR:
+      add_clause() and assume() between solve() calls, then val() after SAT or failed() after UNSAT.
+    solve() returns a Result: SAT, UNSAT, or UNKNOWN when one of its budgets ran out.
+    Learned clauses, heuristics and watches are kept between calls.
+    Variables of clauses and assumptions given after the construction must be in frozen,
+      so that preprocessing does not eliminate them.
+    With a Proof, every clause added or deleted from preprocessing on is logged, and an UNSAT answer
+      without assumptions ends the proof with the empty clause. Clauses from add_clause() are not logged.
+    Preprocessing stops at deadline, a time.perf_counter() value defaulting to PARAMS_BUDGET_TIME seconds
+      from the construction, so that it counts in the time budget of the caller.
+    """
+
+    def __init__(self, sentence, num_vars, frozen=(), proof=None, deadline=None):
+        self.stats = Statistics()
+        self.proof = proof if proof is not None else Proof()
+        # Level-0 assignments logged as units to the proof
+        self.proof_units = 0
+        # Kept for checking the models, add_clause() appends to it
+        self.sentence = list(sentence)
+        # Flat literals and offsets of the sentence for the checker, built at the first model
+        self.flat_sentence = None
+        start = time.perf_counter()
+        if deadline is None:
+            deadline = math.inf if PARAMS_BUDGET_TIME is None else start + PARAMS_BUDGET_TIME
+        sentence, self.elimination_stack = preprocessor.preprocess(
+            sentence, num_vars, frozen, self.proof, deadline)
+        self.stats.times["preprocess"] = time.perf_counter() - start
         self.unsat = False
         self.level = 0
         self.num_vars = num_vars
-        self.clauses = [Clause(clause) for clause in sentence]
+        self.eliminated = bytearray(num_vars + 1)
+        for pivot, _ in self.elimination_stack:
+            self.eliminated[abs(pivot)] = 1
+        self.arena = ClauseArena(num_vars)
+        # Original clauses and learned clauses are kept apart, only the latter are reduced.
+        self.clauses = [self.arena.alloc(clause) for clause in sentence]
+        self.learnts = []
         self.literals = Literals(num_vars)
-        self.watchtable = WatchTable(self.clauses, num_vars)
+        self.watchtable = WatchTable(self.arena, self.clauses, num_vars)
         self.trail = Trail()
         self.conflict = None
+        # Reference of the conflicting clause, -1 for a binary clause
+        self.conflict_ref = -1
+        self.seen = [0] * (num_vars + 1)
+        self.seen_stamp = 0
+        self.learned_literals = 0
+        self.removed_literals = 0
         self.scores = [1] * (2 * num_vars + 1)
         self.scores[0] = 0
         self.subsumption_eliminator = SubsumptionEliminator(
             self, ENABLE_SUBSUMPTION_ON_THE_FLY)
-        for clause in self.clauses:
-            for lit in clause.literals:
+        self.prober = Prober(self, ENABLE_PROBING)
+        self.probe_lim = PARAMS_PROBE_INTERVAL
+        for clause in sentence:
+            for lit in clause:
                 self.scores[lit] += 1
+        rng = None
+        if PARAMS_SEED is not None:
+            rng = random.Random(PARAMS_SEED)
+            # Break the ties between literals of equal occurrence count
+            self.scores = [s + rng.random() for s in self.scores]
+        # Learned clause exchange with the other workers of a portfolio
+        self.exchange = None
+        # Search state of the current solve() call
+        self.initialized = False
+        self.assumptions = []
+        self.conflict_limit = math.inf
+        self.propagation_limit = math.inf
+        self.deadline = math.inf
+        # Clause arena size limit, in entries
+        self.memory_limit = math.inf
+        # Name of the budget exhausted by the current solve() call
+        self.unknown = None
+        # Incremental interface
+        self.pending_assumptions = []
+        self.failed_assumptions = set()
+        self.model = None
+        self.exported = 0
+        self.imported = 0
 
-        vsids = VSIDS(self.scores, num_vars, PARAMS_VSIDS_DECAY)
-        evsids = EVSIDS(self.scores, num_vars, PARAMS_EVSIDS_INCRE)
-        lrb = LRB(num_vars, self.scores, alpha=PARAMS_LRB_ALPHA, alpha_lim=PARAMS_LRB_ALPHA_LIM,
-                  epsilon=PARAMS_LRB_ALPHA_EPSILON, decay=PARAMS_LRB_DECAY, strategy=PARAMS_LRB_STRATEGY)
-        chb = CHB(num_vars, self.trail, step_chb=PARAMS_CHB_STEP,
-                  step_min_chb=PARAMS_CHB_STEP_MIN, step_dec_chb=PARAMS_CHB_STEP_DECAY)
+        # Only build the enabled heuristics, each of them keeps its own order heap.
         self.deciders = []
         if HEURISTIC_ENABLE_LRB:
-            self.deciders.append(lrb)
+            self.deciders.append(LRB(num_vars, self.scores, self.literals, alpha=PARAMS_LRB_ALPHA, alpha_lim=PARAMS_LRB_ALPHA_LIM,
+                                     epsilon=PARAMS_LRB_ALPHA_EPSILON, decay=PARAMS_LRB_DECAY, strategy=PARAMS_LRB_STRATEGY,
+                                     phase=PARAMS_LRB_PHASE, rng=rng))
         if HEURISTIC_ENABLE_CHB:
-            self.deciders.append(chb)
+            self.deciders.append(CHB(num_vars, self.literals, step_chb=PARAMS_CHB_STEP,
+                                     step_min_chb=PARAMS_CHB_STEP_MIN, step_dec_chb=PARAMS_CHB_STEP_DECAY))
         if HEURISTIC_ENABLE_VSIDS:
-            self.deciders.append(vsids)
+            self.deciders.append(
+                VSIDS(self.scores, num_vars, self.literals, PARAMS_VSIDS_DECAY))
         if HEURISTIC_ENABLE_EVSIDS:
-            self.deciders.append(evsids)
+            self.deciders.append(
+                EVSIDS(self.scores, num_vars, self.literals, PARAMS_EVSIDS_INCRE))
         self.decided_vars = 0
+        # decisions is reset at each restart for the MAB reward, total_decisions is not
         self.decisions = 0
+        self.total_decisions = 0
+        self.propagations = 0
         self.mab_agent = UCB(len(self.deciders), PARAMS_UCB_BETA)
         self.active_decider = self.mab_agent.run()
         self.chosen = [0] * (2 * num_vars + 1)
         self.conflicts = 0
-        self.reduce_lim = PARAMS_REDUCE_LIM
+        self.reduce_interval = PARAMS_REDUCE_LIM
+        if len(self.sentence) > 1e5:
+            self.reduce_interval *= math.log10(len(self.sentence) / 1e4)
+        self.reduce_lim = self.reduce_interval
         self.reduces = 0
+        # Trail length and conflict count at which simplify() may run next
+        self.simplify_trail = 0
+        self.simplify_lim = 0
+        self.simplifies = 0
+        self.simplified_clauses = 0
+        self.simplified_literals = 0
         if PARAMS_RESTARTER == "CADICAL":
             self.restarter = CadicalRestart(self)
         else:
             self.restarter = LubyRestart()
 
-    def solve(self):
+    def solve(self, assumptions=(), conflict_limit=None, time_limit=None, propagation_limit=None,
+              memory_limit=None):
+        """
+        Solve the formula under the assumptions, which are decided first in the given order,
+          followed by those given to assume() since the last call.
+        The budgets of this call (seconds, conflicts, propagations and MB of clause arena) default to
+          the PARAMS_BUDGET_* parameters, None for no limit.
+        Returns a Result: SAT with the model, UNSAT under the assumptions,
+          or UNKNOWN with the name of the exhausted budget (also kept in self.unknown).
+        The model is an int8 array of the values of the variables, 1 TRUE and -1 FALSE.
+        Learned clauses are kept, so solve() can be called again with other assumptions.
+        """
+        self.assumptions = list(assumptions) + self.pending_assumptions
+        for lit in self.assumptions:
+            self.check_variable(lit)
+        self.pending_assumptions = []
+        self.failed_assumptions = set()
+        self.set_budgets(conflict_limit, time_limit, propagation_limit, memory_limit)
+        if self.level > 0:
+            self.backtrack(0)
         assignment = self.cdcl_loop()
+        self.model = assignment
+        if self.unsat:
+            self.proof.add([])
+        self.proof.flush()
         if assignment is not None:
-            assert checker.check(self.sentence, assignment, self.literals)
-        return assignment
+            if self.flat_sentence is None:
+                self.flat_sentence = checker.flatten(self.sentence)
+            assert checker.check(*self.flat_sentence, assignment)
+            return Result(Result.SAT, assignment)
+        if self.unknown is not None:
+            return Result(Result.UNKNOWN, reason=self.unknown)
+        return Result(Result.UNSAT)
+
+    def set_budgets(self, conflicts, seconds, propagations, megabytes):
+        """
+        Turn the budgets of a solve() call into absolute limits, checked by budget_exhausted().
+        """
+        def limit(value, default):
+            value = default if value is None else value
+            return math.inf if value is None else value
+
+        self.unknown = None
+        self.conflict_limit = self.conflicts + limit(conflicts, PARAMS_BUDGET_CONFLICTS)
+        self.propagation_limit = self.propagations + limit(propagations, PARAMS_BUDGET_PROPAGATIONS)
+        self.deadline = time.perf_counter() + limit(seconds, PARAMS_BUDGET_TIME)
+        self.memory_limit = limit(megabytes, PARAMS_BUDGET_MEMORY) * (1 << 20) / self.arena.data.itemsize
+
+    def budget_exhausted(self, now):
+        """
+        Returns the name of the first exhausted budget, or None.
+        """
+        if self.conflicts >= self.conflict_limit:
+            return "conflicts"
+        if self.propagations >= self.propagation_limit:
+            return "propagations"
+        if now >= self.deadline:
+            return "time"
+        if len(self.arena.data) >= self.memory_limit:
+            return "memory"
+        return None
+
+    def add_clause(self, clause):
+        """
+        Add an original clause between two solve() calls.
+        Returns False if the formula is found UNSAT.
+        """
+        for lit in clause:
+            self.check_variable(lit)
+        if self.level > 0:
+            self.backtrack(0)
+        self.sentence.append(list(clause))
+        self.flat_sentence = None
+        values = self.literals.lit_values
+        kept = []
+        for lit in clause:
+            if values[lit] == 1 or -lit in kept:
+                # Satisfied at level 0 or tautology
+                return True
+            if values[lit] == 0 and lit not in kept:
+                kept.append(lit)
+        if not kept:
+            self.unsat = True
+            return False
+        cref = self.arena.alloc(kept)
+        self.clauses.append(cref)
+        self.subsumption_eliminator.add_appearance(cref)
+        self.watchtable.attach(cref)
+        for lit in kept:
+            self.scores[lit] += 1
+        if len(kept) == 1:
+            self.assign(kept[0], cref)
+        return True
+
+    def assume(self, lit):
+        """
+        Assume lit in the next solve() call only.
+        """
+        self.check_variable(lit)
+        self.pending_assumptions.append(lit)
+
+    def val(self, lit):
+        """
+        Value of lit in the model found by the last solve() call: lit if TRUE, -lit if FALSE.
+        """
+        return lit if (self.model[abs(lit)] > 0) == (lit > 0) else -lit
+
+    def failed(self, lit):
+        """
+        Returns True if the assumption lit was used to prove UNSAT in the last solve() call.
+        """
+        return lit in self.failed_assumptions
+
+    def check_variable(self, lit):
+        v = abs(lit)
+        if v == 0 or v > self.num_vars:
+            raise ValueError(f"literal {lit} out of the {self.num_vars} variables")
+        if self.eliminated[v]:
+            raise ValueError(f"variable {v} was eliminated by preprocessing, it must be frozen")
 
     def cdcl_loop(self):
-        if not self.solve_unary_lits():
-            return None
+        stats = self.stats
+        times = stats.times
+        clock = time.perf_counter
+        if not self.initialized:
+            self.initialized = True
+            if not self.solve_unary_lits():
+                return None
+            if not self.probe():
+                return None
+            # Left to a later call once the time budget is spent by probing
+            if self.try_simplify() and clock() < self.deadline:
+                self.simplify()
 
-        while self.trail.len() < self.num_vars:
+        # The arena keeps its entries in a new array after each compaction
+        arena = self.arena
+        trail = self.trail
+        # Units added between solve() calls may fill the trail before being propagated
+        while trail.len() < self.num_vars or trail.qhead < trail.len():
             if self.unsat:
                 return None
-            if not self.bcp():
+            start = clock()
+            if (self.conflicts >= self.conflict_limit or self.propagations >= self.propagation_limit
+                    or start >= self.deadline or len(arena.data) >= self.memory_limit):
+                self.unknown = self.budget_exhausted(start)
+                return None
+            ok = self.bcp()
+            now = clock()
+            times["bcp"] += now - start
+            if not ok:
                 self.analyze()
+                times["analyze"] += clock() - now
+                stats.progress(self)
+            elif self.try_simplify():
+                self.simplify()
             elif self.try_restart():
                 self.restart()
             elif self.try_reduce():
                 self.reduce()
+            elif self.level < len(self.assumptions):
+                if not self.decide_assumption():
+                    return None
             elif self.trail.len() < self.num_vars:
                 self.decide()
 
         if self.unsat:
             return None
+        # An assumption left FALSE once all variables are assigned is implied by the previous ones
+        values = self.literals.lit_values
+        for lit in self.assumptions:
+            if values[lit] != 1:
+                self.failed_assumptions = self.analyze_final(lit)
+                return None
 
-        return self.restore_eliminated_variables(self.trail.toDict(self.literals))
+        model = self.restore_eliminated_variables(list(self.literals.values))
+        return np.array(model, dtype=np.int8)
 
     def solve_unary_lits(self):
         for clause in self.clauses:
-            if len(clause) == 1:
-                lit = clause.literals[0]
+            if self.arena.size(clause) == 1:
+                lit = self.arena.literals(clause)[0]
                 if self.literals.get(lit) == 0:
                     self.assign(lit, clause)
                 elif not self.literals.sat(lit):
@@ -104,206 +335,592 @@ class CDCL:
         return True
 
     def bcp(self):
-        self.trail.start_bcp()
+        data = self.arena.data
+        watches = self.watchtable.watches
+        binaries = self.watchtable.binaries
+        values = self.literals.lit_values
         while True:
             lit = self.trail.next()
             if lit == None:
                 # Reached top of self.trail.stack. Exit.
                 break
+            self.propagations += 1
             # Check for clauses that might derive new assignments
-            lit = -lit
-            for clause in self.watchtable.l2c(lit).copy():
-                # The watched literals does not sat
-                if self.watchtable.sat(clause, self.literals):
-                    # the watched literals sat, continue BCP
-                    continue
-                # Try to update watched literals
-                if self.watchtable.update(clause, lit, self.literals):
-                    # update success, continue BCP
+            false_lit = -lit
+            # Binary implications first, the antecedent is recorded as the other literal
+            reason = None
+            for other in binaries[false_lit]:
+                value = values[other]
+                if value == 1:
                     continue
-                # Update failed
-                other = self.watchtable.get_other_watch(clause, lit)
-                if self.literals.get(other) == 0:
-                    # Derive a new assignment
-                    self.assign(other, clause)
+                if value == 0:
+                    if reason is None:
+                        reason = binary_reason(false_lit)
+                    self.assign(other, reason)
                 else:
                     # UNSAT, Backtrack
-                    self.conflict = clause
+                    self.conflict = [other, false_lit]
+                    self.conflict_ref = -1
                     return False
+            ws = watches[false_lit]
+            # Scan the watch list and compact it in place:
+            #   i reads the next (clause, blocker) pair, j writes the pairs that keep watching false_lit.
+            i = j = 0
+            n = len(ws)
+            while i < n:
+                cref = ws[i]
+                blocker = ws[i + 1]
+                i += 2
+                if values[blocker] == 1:
+                    # the blocker sat, continue BCP
+                    ws[j] = cref
+                    ws[j + 1] = blocker
+                    j += 2
+                    continue
+                # Make sure the false literal is at position 1
+                start = cref + HEADER_SIZE
+                first = data[start]
+                if first == false_lit:
+                    first = data[start + 1]
+                    data[start] = first
+                    data[start + 1] = false_lit
+                if first != blocker and values[first] == 1:
+                    # the other watched literal sat, use it as the new blocker
+                    ws[j] = cref
+                    ws[j + 1] = first
+                    j += 2
+                    continue
+                # Try to find a new literal to watch
+                for k in range(start + 2, start + data[cref + SIZE]):
+                    other = data[k]
+                    if values[other] != -1:
+                        # update success, the clause leaves this watch list
+                        data[start + 1] = other
+                        data[k] = false_lit
+                        watches[other] += (cref, first)
+                        break
+                else:
+                    # Update failed, the clause is unit or conflicting
+                    ws[j] = cref
+                    ws[j + 1] = first
+                    j += 2
+                    if values[first] == 0:
+                        # Derive a new assignment
+                        self.assign(first, cref)
+                    else:
+                        # UNSAT, Backtrack
+                        while i < n:
+                            ws[j] = ws[i]
+                            j += 1
+                            i += 1
+                        del ws[j:]
+                        self.conflict = data[start:start +
+                                             data[cref + SIZE]].tolist()
+                        self.conflict_ref = cref
+                        return False
+            del ws[j:]
         return True  # indicate no conflict; otherwise return the antecedent of the conflict
 
     def analyze(self):
         """
         Analyze the conflict with first-UIP clause learning.
+        Walks the trail backwards, counting the literals of the conflict level still to be resolved.
+        seen[v] == seen_stamp marks the variables already visited in this analysis.
         """
         self.conflicts += 1
-        learned_clause = self.conflict.copy()
-        d = self.conflict.deepest_level(self.literals)
+        levels = self.literals.levels
+        antecedents = self.literals.reasons
+        arena = self.arena
+        data = arena.data
+        stack = self.trail.stack
+        d = max(levels[abs(lit)] for lit in self.conflict)
         if d == 0:
             self.unsat = True
             return
+        if d < self.level:
+            self.backtrack(d)
+        if self.conflict_ref >= 0:
+            arena.bump(self.conflict_ref, self.literals)
 
-        ptr = -1
+        self.seen_stamp += 1
+        stamp = self.seen_stamp
+        seen = self.seen
+        # Position 0 is reserved for the asserting literal
+        learned_clause = [0]
         conflict_side = []
-        while not learned_clause.one_lit_at_level(d, self.literals):
-            literal = self.trail.stack[ptr]
-            clause = self.literals.ante(literal)
-            clause.recompute_glue(self.literals)
+        counter = 0
+        ptr = len(stack) - 1
+        clause = self.conflict
+        while True:
+            for lit in clause:
+                v = abs(lit)
+                if seen[v] != stamp and levels[v] > 0:
+                    seen[v] = stamp
+                    if levels[v] >= d:
+                        counter += 1
+                    else:
+                        learned_clause.append(lit)
+            # Select the next literal of the conflict level to resolve on
+            while seen[abs(stack[ptr])] != stamp:
+                ptr -= 1
+            literal = stack[ptr]
             ptr -= 1
-            # First pop irrelevant assignments
-            if -literal in learned_clause.literals:
-                learned_clause.resolve(literal, clause)
-                conflict_side.append(literal)
+            seen[abs(literal)] = 0
+            counter -= 1
+            if counter == 0:
+                break
+            conflict_side.append(literal)
+            reason = antecedents[abs(literal)]
+            if reason < 0:
+                clause = (binary_reason_literal(reason),)
+            else:
+                arena.bump(reason, self.literals)
+                # The implied literal is at position 0 of its antecedent
+                start = reason + HEADER_SIZE
+                clause = data[start + 1:start + data[reason + SIZE]]
+        d1_lit = -literal
+        learned_clause[0] = d1_lit
+        size = len(learned_clause)
+        self.minimize(learned_clause)
+        if ENABLE_MINIMIZE_BINARY and len(learned_clause) <= PARAMS_MINIMIZE_BINARY_MAX_SIZE:
+            self.binary_minimize(learned_clause)
+        self.learned_literals += size
+        self.removed_literals += size - len(learned_clause)
 
-        backtrack_level = learned_clause.second_deepest_level(self.literals)
-        if backtrack_level < 0:
-            self.unsat = True
-            return
-        self.learn_clause(learned_clause)
+        # Watch the asserting literal and the deepest of the others.
+        # When backtrack happens, they are the first literals to be unassigned in the clause.
+        backtrack_level = 0
+        d2_lit = None
+        for i in range(1, len(learned_clause)):
+            level = levels[abs(learned_clause[i])]
+            if level > backtrack_level:
+                backtrack_level = level
+                d2_lit = learned_clause[i]
+                learned_clause[i] = learned_clause[1]
+                learned_clause[1] = d2_lit
+        cref = self.learn_clause(learned_clause)
+        self.stats.learned += 1
+        self.stats.glue_sum += self.arena.glue(cref)
+        if self.exchange is not None and len(learned_clause) <= PARAMS_SHARE_SIZE \
+                and self.arena.glue(cref) <= PARAMS_SHARE_GLUE:
+            self.exchange.export(learned_clause)
+            self.exported += 1
         if PARAMS_RESTARTER == "CADICAL":
-            self.restarter.update_glucose(learned_clause.glue)
+            self.restarter.update_glucose(self.arena.glue(cref))
 
         reasons = []
-        for literal in learned_clause.literals:
-            r = self.literals.ante(literal)
-            if r is not None:
-                reasons.append(r)
+        for literal in learned_clause:
+            if self.literals.ante(literal) is not None:
+                reasons.append(self.reason_literals(-literal))
         if PARAMS_LRB_STRATEGY == LRB.Strategy.CONFLICT_SIDE:
             for d in self.deciders:
                 d.update_scores(learned_clause, conflict_side, reasons)
         else:
             for d in self.deciders:
-                d.update_scores(learned_clause, self.conflict.literals, reasons)
+                d.update_scores(learned_clause, self.conflict, reasons)
 
         self.backtrack(backtrack_level)
         # Immediately derive from the newly learned clause
-        d1_lit = self.watchtable.c2l(learned_clause)[0]
-        self.assign(d1_lit, learned_clause)
+        if len(learned_clause) == 2:
+            self.assign(d1_lit, binary_reason(d2_lit))
+        else:
+            self.assign(d1_lit, cref)
+
+    def minimize(self, learned_clause):
+        """
+        Recursive learned clause minimization (MiniSat).
+        Removes the literals implied by the other literals of the clause.
+        """
+        levels = self.literals.levels
+        reasons = self.literals.reasons
+        abstract = 0
+        for i in range(1, len(learned_clause)):
+            abstract |= 1 << (levels[abs(learned_clause[i])] & 31)
+        j = 1
+        for i in range(1, len(learned_clause)):
+            lit = learned_clause[i]
+            if reasons[abs(lit)] is None or not self.lit_redundant(lit, abstract):
+                learned_clause[j] = lit
+                j += 1
+        del learned_clause[j:]
+
+    def lit_redundant(self, lit, abstract):
+        """
+        Returns True if the literal is implied by the learned clause through its antecedents.
+        Variables proven redundant stay marked as seen, so they are not explored again.
+        abstract is a bitmask of the levels in the clause, a literal at any other level can not be removed.
+        """
+        levels = self.literals.levels
+        reasons = self.literals.reasons
+        data = self.arena.data
+        seen = self.seen
+        stamp = self.seen_stamp
+        stack = [lit]
+        marked = []
+        while stack:
+            reason = reasons[abs(stack.pop())]
+            if reason < 0:
+                clause = (binary_reason_literal(reason),)
+            else:
+                start = reason + HEADER_SIZE
+                clause = data[start + 1:start + data[reason + SIZE]]
+            for other in clause:
+                v = abs(other)
+                if seen[v] == stamp or levels[v] == 0:
+                    continue
+                if reasons[v] is not None and (1 << (levels[v] & 31)) & abstract:
+                    seen[v] = stamp
+                    stack.append(other)
+                    marked.append(v)
+                else:
+                    for v in marked:
+                        seen[v] = 0
+                    return False
+        return True
+
+    def binary_minimize(self, learned_clause):
+        """
+        Binary implication minimization (Glucose).
+        Removes literal l if a binary clause (asserting literal, -l) exists.
+        """
+        seen = self.seen
+        self.seen_stamp += 1
+        stamp = self.seen_stamp
+        for i in range(1, len(learned_clause)):
+            seen[abs(learned_clause[i])] = stamp
+        values = self.literals.lit_values
+        removed = 0
+        for other in self.watchtable.binaries[learned_clause[0]]:
+            v = abs(other)
+            if seen[v] == stamp and values[other] == 1:
+                seen[v] = 0
+                removed += 1
+        if removed > 0:
+            learned_clause[1:] = [lit for lit in learned_clause[1:]
+                                  if seen[abs(lit)] == stamp]
+
+    def reason_literals(self, literal):
+        """
+        Get the literals of the antecedent of an assigned literal.
+        """
+        reason = self.literals.ante(literal)
+        if reason < 0:
+            return [literal, binary_reason_literal(reason)]
+        return self.arena.literals(reason)
 
     def decide(self):
         self.decisions += 1
+        self.total_decisions += 1
         lit = self.deciders[self.active_decider].decide()
         if self.chosen[lit] == 0:
             self.decided_vars += 1
             self.chosen[lit] = 1
         self.assign(lit, None)
 
+    def decide_assumption(self):
+        """
+        Decide the assumption of the next level. A TRUE assumption opens an empty level.
+        Returns False if the assumption is FALSE.
+        """
+        lit = self.assumptions[self.level]
+        value = self.literals.lit_values[lit]
+        if value == -1:
+            self.failed_assumptions = self.analyze_final(lit)
+            return False
+        if value == 0:
+            self.assign(lit, None)
+        else:
+            self.level += 1
+            self.trail.new_level()
+        return True
+
+    def analyze_final(self, lit):
+        """
+        Collect the assumptions implying -lit, lit being a FALSE assumption (MiniSat analyzeFinal).
+        Above level 0 only assumptions are decided, so the decisions reached
+          through the antecedents of -lit are the failed assumptions.
+        """
+        failed = {lit}
+        levels = self.literals.levels
+        reasons = self.literals.reasons
+        if levels[abs(lit)] == 0:
+            return failed
+        seen = self.seen
+        self.seen_stamp += 1
+        stamp = self.seen_stamp
+        seen[abs(lit)] = stamp
+        stack = self.trail.stack
+        for i in range(len(stack) - 1, self.trail.trail_lim[0] - 1, -1):
+            x = stack[i]
+            v = abs(x)
+            if seen[v] != stamp:
+                continue
+            if reasons[v] is None:
+                failed.add(x)
+                continue
+            for other in self.reason_literals(x):
+                if other != x and levels[abs(other)] > 0:
+                    seen[abs(other)] = stamp
+        return failed
+
     def learn_clause(self, clause):
-        self.subsumption_eliminator.update_and_eliminate(clause)
-        clause.compute_glue(self.literals)
-        self.clauses.append(clause)
-        self.watchtable.append(clause, self.literals)
+        self.proof.add(clause)
+        cref = self.arena.alloc(clause, learnt=True)
+        self.subsumption_eliminator.update_and_eliminate(cref)
+        self.arena.compute_glue(cref, self.literals)
+        self.learnts.append(cref)
+        self.watchtable.attach(cref)
+        return cref
 
     def backtrack(self, level):
-        lit = self.trail.stack.pop()
-        while self.literals.level(lit) > level and len(self.trail.stack) > 0:
-            lit = self.unassign(lit)
-        if self.literals.level(lit) == level:
-            self.trail.stack.append(lit)
-        else:
-            # Special case if there is nothing in level 0
-            # No need to push back.
-            self.literals.unassign(lit)
-            for d in self.deciders:
-                d.on_unassign(lit)
-        self.level = level
+        undone = self.trail.backtrack(level)
+        self.literals.unassign_all(undone)
+        for d in self.deciders:
+            d.on_unassign_all(undone)
+        self.level = self.trail.level()
 
     def try_restart(self):
         if self.restarter.restart():
-            print("Restarting...")
-            reward = math.log2(self.decisions) / self.decided_vars
+            self.stats.restarts += 1
+            # Restarts between assumptions only may not have any decision to reward
+            if self.decided_vars > 0:
+                reward = math.log2(self.decisions) / self.decided_vars
+                self.mab_agent.reward(reward)
+                self.active_decider = self.mab_agent.run()
             self.chosen = [0] * (2 * self.num_vars + 1)
             self.decided_vars = 0
             self.decisions = 0
-            self.mab_agent.reward(reward)
-            self.active_decider = self.mab_agent.run()
             return True
         return False
 
     def restart(self):
         self.backtrack(0)
+        if self.exchange is not None:
+            self.import_clauses()
+        if self.conflicts >= self.probe_lim:
+            self.probe()
+            self.probe_lim = self.conflicts + \
+                PARAMS_PROBE_INTERVAL * (self.prober.rounds + 1)
+        if self.try_simplify():
+            self.simplify()
+
+    def probe(self):
+        start = time.perf_counter()
+        ok = self.prober.probe()
+        self.stats.times["probe"] += time.perf_counter() - start
+        return ok
+
+    def import_clauses(self):
+        """
+        Add the clauses shared by the other workers of a portfolio, at level 0.
+        They are stripped of their false literals, and become new units if a single literal is left.
+          The new units are propagated by cdcl_loop, which runs until the trail is fully propagated.
+        """
+        values = self.literals.lit_values
+        eliminated = self.eliminated
+        for clause in self.exchange.receive():
+            kept = []
+            for lit in clause:
+                value = values[lit]
+                if value == 1 or eliminated[abs(lit)]:
+                    break
+                if value == 0:
+                    kept.append(lit)
+            else:
+                if not kept:
+                    self.unsat = True
+                    return
+                cref = self.learn_clause(kept)
+                self.imported += 1
+                if len(kept) == 1:
+                    self.assign(kept[0], cref)
+
+    def try_simplify(self):
+        """
+        Simplify once new units are fully propagated at level 0, at most every PARAMS_SIMPLIFY_INTERVAL conflicts.
+        """
+        trail = self.trail
+        return self.level == 0 and not self.unsat and trail.len() > self.simplify_trail \
+            and trail.qhead == trail.len() and self.conflicts >= self.simplify_lim
+
+    def simplify(self):
+        """
+        Simplify the clause database with the level-0 assignments:
+          satisfied clauses are deleted and false literals are stripped.
+        Without conflict at level 0 every remaining clause keeps two unassigned watched literals,
+          so the watches are rebuilt from the positions 0 and 1 of the clauses.
+        Eliminated variables never occur in the clauses, the elimination stack stays valid.
+        """
+        start = time.perf_counter()
+        arena = self.arena
+        data = arena.data
+        values = self.literals.lit_values
+        reasons = self.literals.reasons
+        eliminator = self.subsumption_eliminator
+        proof = self.proof
+        if proof.enabled:
+            # Satisfied reasons of level-0 assignments are deleted, the assignments stay as units
+            for lit in self.trail.stack[self.proof_units:]:
+                proof.add([lit])
+            self.proof_units = self.trail.len()
+        deleted = stripped = 0
+        for crefs in (self.clauses, self.learnts):
+            for c in crefs:
+                if data[c + FLAGS] & DELETED:
+                    continue
+                lits = arena.literals(c)
+                kept = []
+                for lit in lits:
+                    value = values[lit]
+                    if value == 1:
+                        break
+                    if value == 0:
+                        kept.append(lit)
+                else:
+                    if len(kept) < len(lits):
+                        proof.add(kept)
+                        proof.delete(lits)
+                        eliminator.remove_appearance(c)
+                        arena.shrink(c, kept)
+                        eliminator.add_appearance(c)
+                        stripped += len(lits) - len(kept)
+                    continue
+                proof.delete(lits)
+                eliminator.remove_appearance(c)
+                arena.free(c)
+                deleted += 1
+        # Level-0 assignments are never analyzed, they do not need their antecedents.
+        for lit in self.trail.stack:
+            r = reasons[abs(lit)]
+            if r is not None and r >= 0 and data[r + FLAGS] & DELETED:
+                reasons[abs(lit)] = None
+
+        self.clauses = [c for c in self.clauses if not data[c + FLAGS] & DELETED]
+        self.learnts = [c for c in self.learnts if not data[c + FLAGS] & DELETED]
+        self.watchtable.rebuild(self.clauses + self.learnts)
+        self.simplifies += 1
+        self.simplified_clauses += deleted
+        self.simplified_literals += stripped
+        self.simplify_trail = self.trail.len()
+        self.simplify_lim = self.conflicts + PARAMS_SIMPLIFY_INTERVAL
+        if arena.wasted > PARAMS_ARENA_GC_FRACTION * len(arena.data):
+            self.garbage_collect()
+        self.stats.times["simplify"] += time.perf_counter() - start
 
     def try_reduce(self):
         if self.conflicts > self.reduce_lim:
-            print("Reducing...")
             self.reduces += 1
-            delta = 300 * (self.reduces + 1)
-            if len(self.sentence) > 1e5:
-                delta *= math.log10(len(self.sentence) / 1e4)
-            self.reduce_lim = self.conflicts + delta
+            self.reduce_interval *= PARAMS_REDUCE_GROWTH
+            self.reduce_lim = self.conflicts + self.reduce_interval
             return True
         return False
 
     def reduce(self):
-        for c in reversed(self.clauses):
-            if c.used == 0:
-                self.eliminate_clause(c)
-            if c.used > 0:
-                c.used -= 1
+        """
+        Reduce the learned clause database, which is split in three tiers by glue:
+          - core (glue <= PARAMS_REDUCE_TIER1_GLUE), binary and subsuming clauses are kept forever,
+          - tier2 (glue <= PARAMS_REDUCE_TIER2_GLUE) is kept while used since the last reduction,
+          - local and unused tier2 clauses are sorted by activity and the worse half is deleted.
+        Clauses are only marked as deleted, the watch lists and clause lists are then swept once.
+          Binary clauses live in the binary implication lists, which are not swept.
+        """
+        start = time.perf_counter()
+        arena = self.arena
+        data = arena.data
+        core = tier2 = 0
+        candidates = []
+        for c in self.learnts:
+            flags = data[c + FLAGS]
+            if flags & DELETED:
+                continue
+            glue = data[c + GLUE]
+            if glue <= PARAMS_REDUCE_TIER1_GLUE or flags & SUBSUMING or data[c + SIZE] <= 2:
+                core += 1
+            elif glue <= PARAMS_REDUCE_TIER2_GLUE and data[c + USED]:
+                tier2 += 1
+            else:
+                candidates.append(c)
+            data[c + USED] = 0
 
-    def eagerly_subsume(self, clause):
+        candidates.sort(key=lambda c: (arena.activity(c), -data[c + GLUE]))
         deleted = 0
-        for c in reversed(self.clauses):
-            if c.used > 0:
-                length = len(clause.literals)
-                for lit in c.literals:
-                    if lit in clause.literals:
-                        length -= 1
-                    if length == 0:
-                        self.clauses.remove(c)
-                        for lit in self.watchtable.c2l(c):
-                            self.watchtable.l2c(lit).remove(c)
-                        self.watchtable.c2l_watch.pop(c)
-                        deleted += 1
-                        break
-                if deleted == 20:
-                    return
+        proof = self.proof
+        for c in candidates[:len(candidates) // 2]:
+            if not self.locked(c):
+                if proof.enabled:
+                    proof.delete(arena.literals(c))
+                self.subsumption_eliminator.remove_appearance(c)
+                arena.free(c)
+                deleted += 1
+        for c in candidates:
+            data[c + ACTIVITY] >>= 1
+
+        self.learnts = [c for c in self.learnts if not data[c + FLAGS] & DELETED]
+        self.clauses = [c for c in self.clauses if not data[c + FLAGS] & DELETED]
+        self.watchtable.sweep()
+        self.stats.deleted += deleted
+        self.stats.tiers = {"core": core, "tier2": tier2, "local": len(candidates) - deleted}
+        if arena.wasted > PARAMS_ARENA_GC_FRACTION * len(arena.data):
+            self.garbage_collect()
+        self.stats.times["reduce"] += time.perf_counter() - start
+
+    def locked(self, cref):
+        """
+        Returns True if the clause is the antecedent of a current assignment.
+        """
+        lit = self.arena.data[cref + HEADER_SIZE]
+        return self.literals.reasons[abs(lit)] == cref
+
+    def garbage_collect(self):
+        """
+        Compact the clause arena and rewrite every clause reference.
+        """
+        relocation = self.arena.compact(self.clauses + self.learnts)
+        self.clauses = [relocation[c] for c in self.clauses]
+        self.learnts = [relocation[c] for c in self.learnts]
+        self.watchtable.relocate(relocation)
+        self.subsumption_eliminator.relocate(relocation)
+        reasons = self.literals.reasons
+        for lit in self.trail.stack:
+            r = reasons[abs(lit)]
+            if r is not None and r >= 0:
+                reasons[abs(lit)] = relocation[r]
+        self.stats.collections += 1
 
     def assign(self, lit, clause):
         if clause == None:
             self.level += 1
+            self.trail.new_level()
         self.trail.push(lit)
         self.literals.assign(lit, self.level, clause)
         for d in self.deciders:
             d.on_assign(lit)
 
-    def unassign(self, lit):
-        self.literals.unassign(lit)
-        for d in self.deciders:
-            d.on_unassign(lit)
-        return self.trail.stack.pop()
-
     def eliminate_clause(self, clause):
         """
-        Remove clause from clauses list, watchtable and appearance list.
+        Remove clause from watchtable and appearance list, and mark it as deleted.
+        It is dropped from the clause lists on the next reduce().
         """
-        if clause.subsuming:
+        if self.arena.subsuming(clause):
             return
-        self.clauses.remove(clause)
-        for lit in self.watchtable.c2l(clause):
-            self.watchtable.l2c(lit).remove(clause)
-        self.watchtable.c2l_watch.pop(clause)
+        if self.proof.enabled:
+            self.proof.delete(self.arena.literals(clause))
+        self.watchtable.detach(clause)
         self.subsumption_eliminator.remove_appearance(clause)
+        self.arena.free(clause)
 
-    def restore_eliminated_variables(self, assign):
+    def restore_eliminated_variables(self, values):
         """
-        Assign values for eliminated variables.
+        Assign values for eliminated variables, values being the 1/-1 list of the variables.
+        The elimination stack is replayed in reverse: the pivot is made TRUE
+          whenever no other literal of its saved clause is TRUE.
         """
-        for l in self.clauses_eliminated:
-            clause = list(self.clauses_eliminated[l])
+        for pivot, clause in reversed(self.elimination_stack):
             sat = False
             for lit in clause:
-                if assign[abs(lit)] == (lit > 0):
+                if lit != pivot and values[abs(lit)] * lit > 0:
                     sat = True
                     break
-            if sat:
-                if l > 0:
-                    assign[l] = False
-                else:
-                    assign[-l] = True
-            else:
-                if l > 0:
-                    assign[l] = True
-                else:
-                    assign[-l] = False
-        return assign
+            if not sat:
+                values[abs(pivot)] = 1 if pivot > 0 else -1
+        return values
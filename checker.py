@@ -1,13 +1,30 @@
-def check(sentence, assign, literals):
-    """
-    Checks whether the assignment is correct.
-    """
-    for s in sentence:
-        sat = False
-        for lit in s:
-            if assign[abs(lit)] == (lit > 0):
-                sat = True
-                break
-        if sat == False:
-            return False
-    return True
+import itertools
+
+import numpy as np
+
+
+def flatten(sentence):
+    """
+    Returns (literals, offsets) of the clauses in the layout of utils.parse_cnf:
+      clause i is literals[offsets[i]:offsets[i + 1]].
+    """
+    offsets = np.zeros(len(sentence) + 1, dtype=np.int64)
+    np.cumsum([len(s) for s in sentence], out=offsets[1:])
+    literals = np.fromiter(itertools.chain.from_iterable(sentence), dtype=np.int32, count=offsets[-1])
+    return literals, offsets
+
+
+def check(literals, offsets, model):
+    """
+    Checks whether the model satisfies every clause.
+    model is the int8 value array of the variables (1 TRUE, -1 FALSE), literals and offsets are flat clauses.
+    A literal is TRUE if its sign times the value of its variable is positive, each clause is reduced with OR.
+    """
+    if len(offsets) < 2:
+        return True
+    sizes = np.diff(offsets)
+    if not sizes.all():
+        # Empty clause
+        return False
+    true = model[np.abs(literals)] * np.sign(literals) > 0
+    return bool(np.logical_or.reduceat(true, offsets[:-1]).all())
@@ -1,116 +1,148 @@
-class Clause:
+from array import array
+
+# Header layout of a clause in the arena. The literals follow the header.
+SIZE = 0
+GLUE = 1
+USED = 2
+FLAGS = 3
+ACTIVITY = 4
+HEADER_SIZE = 5
+
+# Clause flags
+LEARNT = 1
+DELETED = 2
+SUBSUMING = 4
+
+
+class ClauseArena:
     """
-    Utilities for clause operations.
+    Flat storage for all clauses.
+    Every clause lives in one contiguous int array and is addressed by its reference (cref),
+      which is the offset of its header in the array.
+    Deleted clauses are only marked; their space is reclaimed by compact().
     """
 
-    def __init__(self, literals):
-        self.literals = literals.copy()
-        self.used = -1
-        self.glue = 0
-        self.subsumed = None
-        self.subsuming = False
+    def __init__(self, num_vars=0):
+        self.data = array('i')
+        self.num_clauses = 0
+        self.wasted = 0
+        # level_stamps[level] == stamp marks the levels already counted by lbd()
+        self.level_stamps = [0] * (num_vars + 1)
+        self.stamp = 0
+
+    def alloc(self, literals, learnt=False):
+        """
+        Append a new clause and return its reference.
+        """
+        cref = len(self.data)
+        self.data.extend((len(literals), 0, 0, LEARNT if learnt else 0, 0))
+        self.data.extend(literals)
+        self.num_clauses += 1
+        return cref
+
+    def size(self, cref):
+        return self.data[cref + SIZE]
+
+    def literals(self, cref):
+        start = cref + HEADER_SIZE
+        return self.data[start:start + self.data[cref + SIZE]].tolist()
+
+    def glue(self, cref):
+        return self.data[cref + GLUE]
 
-    def __len__(self):
-        return len(self.literals)
+    def subsuming(self, cref):
+        return self.data[cref + FLAGS] & SUBSUMING != 0
 
-    def deepest_literals(self, literals):
+    def subsumed_by(self, cref, other):
         """
-        Get the literal with deepest/second deepest level.
-        This is always called on a learned clause, so that there is only one deepest literal.
+        Mark other as subsuming clause, it will never be eliminated.
         """
-        d1_level = -1
-        d2_level = -1
-        d1_lit = None
-        d2_lit = None
-        for lit in self.literals:
-            if literals.level(lit) > d1_level:
-                d2_level = d1_level
-                d2_lit = d1_lit
-                d1_level = literals.level(lit)
-                d1_lit = lit
-            elif literals.level(lit) > d2_level:
-                d2_level = literals.level(lit)
-                d2_lit = lit
-        return d1_lit, d2_lit
+        self.data[other + FLAGS] |= SUBSUMING
 
-    def deepest_level(self, literals):
+    def free(self, cref):
         """
-        Get the deepest level. For analyze_conflict().
+        Mark the clause as deleted. The space is reclaimed on the next compact().
         """
-        return max([literals.level(lit) for lit in self.literals])
+        self.data[cref + FLAGS] |= DELETED
+        self.wasted += HEADER_SIZE + self.data[cref + SIZE]
+        self.num_clauses -= 1
 
-    def second_deepest_level(self, literals):
+    def shrink(self, cref, literals):
         """
-        Get the second deepest level (or -1). For Trail.backtrack().
+        Replace the literals of the clause by a subset of them, keeping their order.
+        The glue is capped by the new size, so a clause shrunk to a binary is in the core tier.
+        The space left at the end of the clause is reclaimed on the next compact().
         """
-        if len(self.literals) > 1:
-            tmp = [literals.level(lit) for lit in self.literals]
-            tmp.remove(max(tmp))
-            return max(tmp)
-        return 0
+        data = self.data
+        start = cref + HEADER_SIZE
+        self.wasted += data[cref + SIZE] - len(literals)
+        data[start:start + len(literals)] = array('i', literals)
+        data[cref + SIZE] = len(literals)
+        data[cref + GLUE] = min(data[cref + GLUE], len(literals) - 1)
 
-    def one_lit_at_level(self, level, literals):
+    def activity(self, cref):
+        return self.data[cref + ACTIVITY]
+
+    def bump(self, cref, literals):
         """
-        Returns True if there is only one literal at the given level.
+        Bump the activity of a learned clause taking part in a conflict,
+          mark it used and lower its glue (LBD) if it improved.
         """
-        count = 0
-        for lit in self.literals:
-            if literals.level(lit) == level:
-                count += 1
-                if count > 1:
-                    return False
-        return count == 1
+        data = self.data
+        # irredundant
+        if not data[cref + FLAGS] & LEARNT:
+            return
+        data[cref + ACTIVITY] += 1
+        data[cref + USED] = 1
+        glue = self.lbd(cref, literals)
+        if glue < data[cref + GLUE]:
+            data[cref + GLUE] = glue
 
-    def copy(self):
-        return Clause(self.literals.copy())
+    def compute_glue(self, cref, literals):
+        """
+        Compute the glue (LBD) of a learned clause
+        """
+        self.data[cref + GLUE] = self.lbd(cref, literals)
 
-    def resolve(self, lit, other):
+    def lbd(self, cref, literals):
         """
-        Binary resolution.
+        Count the distinct decision levels of the clause.
         """
-        #assert other != None
-        self.literals = list(
-            (set(self.literals) | set(other.literals)) - set((lit, -lit)))
+        data = self.data
+        levels = literals.levels
+        level_stamps = self.level_stamps
+        self.stamp += 1
+        stamp = self.stamp
+        glue = 0
+        start = cref + HEADER_SIZE
+        for i in range(start, start + data[cref + SIZE]):
+            level = levels[abs(data[i])]
+            if level_stamps[level] != stamp:
+                level_stamps[level] = stamp
+                glue += 1
+        return glue
 
-    def recompute_glue(self, literals):
+    def compact(self, crefs):
         """
-        Recompute the glue (LBD) of each clause
+        Garbage collection. Copy the given live clauses into a fresh array.
+        Returns the relocation map from old to new references.
         """
-        # irredundant
-        if self.used == -1:
-            return
-        levels = []
-        for lit in self.literals:
-            levels.append(literals.levels[lit])
-        new_glue = len(set(levels))
-        self.used = 1
-        if new_glue < self.glue:
-            if new_glue <= 2:
-                self.used = -1
-                self.glue = 0
-            elif self.glue > 6 and new_glue <= 6:
-                self.used = 2
-            else:
-                self.glue = new_glue
-        elif self.glue <= 6:
-            self.used = 2
-
-    def compute_glue(self, literals):
-        """
-        Compute the glue (LBD) of each learned clause
-        """
-        levels = []
-        for lit in self.literals:
-            levels.append(literals.levels[lit])
-        self.glue = len(set(levels))
-        if self.glue <= 2:  # always keep
-            self.used = -1
-            self.glue = 0
-        elif self.glue <= 6:
-            self.used = 2
-        else:
-            self.used = 1
-
-    def subsumed_by(self, clause):
-        self.subsumed = clause
-        clause.subsuming = True
\ No newline at end of file
+        data = self.data
+        new_data = array('i')
+        relocation = {}
+        for cref in crefs:
+            relocation[cref] = len(new_data)
+            new_data.extend(data[cref:cref + HEADER_SIZE + data[cref + SIZE]])
+        self.data = new_data
+        self.num_clauses = len(crefs)
+        self.wasted = 0
+        return relocation
+
+    def memory(self):
+        return len(self.data) * self.data.itemsize
+
+    def bytes_per_clause(self):
+        if self.num_clauses == 0:
+            return 0
+        return self.memory() / self.num_clauses
+
@@ -0,0 +1,164 @@
+import queue
+import time
+
+from cdcl import CDCL
+from params import *
+from result import Result
+from utils import silence_worker, worker_context
+
+# Solver of a pool worker, inherited from the parent when the pool is forked
+_solver = None
+
+
+class Splitter:
+    """
+    Lookahead splitter producing the cubes of cube-and-conquer.
+    The candidate variables are the unassigned, not eliminated variables with the highest product of
+      positive and negative occurrence counts. Each candidate is propagated in both polarities,
+      and the variable with the highest product of implied literals is branched on.
+    A polarity refuted by propagation gives no cube, so the cubes only cover the open part of the search space.
+    """
+
+    def __init__(self, cdcl, candidates=PARAMS_CUBE_CANDIDATES):
+        self.cdcl = cdcl
+        self.candidates = candidates
+
+    def split(self, cube, depth):
+        """
+        Split cube into cubes of up to len(cube) + depth literals.
+        Returns no cube if the cube is refuted by propagation.
+        """
+        cdcl = self.cdcl
+        cdcl.backtrack(0)
+        if not cdcl.bcp():
+            cdcl.unsat = True
+            return []
+        for lit in cube:
+            if not self.propagate(lit):
+                cdcl.backtrack(0)
+                return []
+        cubes = self.branch(list(cube), depth)
+        cdcl.backtrack(0)
+        return cubes
+
+    def branch(self, cube, depth):
+        cdcl = self.cdcl
+        if depth == 0:
+            return [cube]
+        v = self.lookahead()
+        if v is None:
+            return [cube]
+        cubes = []
+        level = cdcl.level
+        for lit in (v, -v):
+            if self.propagate(lit):
+                cubes += self.branch(cube + [lit], depth - 1)
+            cdcl.backtrack(level)
+        return cubes
+
+    def lookahead(self):
+        """
+        Returns the variable to branch on, or None if all candidates are assigned.
+        """
+        cdcl = self.cdcl
+        values = cdcl.literals.values
+        scores = cdcl.scores
+        eliminated = cdcl.eliminated
+        free = [v for v in range(1, cdcl.num_vars + 1) if values[v] == 0 and not eliminated[v]]
+        free.sort(key=lambda v: scores[v] * scores[-v], reverse=True)
+        best, best_score = None, -1
+        level = cdcl.level
+        for v in free[:self.candidates]:
+            implied = []
+            for lit in (v, -v):
+                start = cdcl.trail.len()
+                if self.propagate(lit):
+                    implied.append(cdcl.trail.len() - start)
+                else:
+                    # A refuted polarity halves the search space at no cost
+                    implied.append(cdcl.num_vars)
+                cdcl.backtrack(level)
+            score = (implied[0] + 1) * (implied[1] + 1)
+            if score > best_score:
+                best, best_score = v, score
+        return best
+
+    def propagate(self, lit):
+        """
+        Assign lit at a new level and propagate. Returns False on conflict.
+        """
+        cdcl = self.cdcl
+        value = cdcl.literals.lit_values[lit]
+        if value == -1:
+            return False
+        if value == 1:
+            cdcl.level += 1
+            cdcl.trail.new_level()
+            return True
+        cdcl.assign(lit, None)
+        return cdcl.bcp()
+
+
+def init_worker(sentence, num_vars):
+    global _solver
+    silence_worker()
+    if _solver is None:
+        _solver = CDCL(sentence, num_vars)
+
+
+def solve_cube(cube, conflict_limit):
+    """
+    Solve one cube as assumptions. Returns (cube, result, time, conflicts).
+    """
+    start_time = time.time()
+    conflicts = _solver.conflicts
+    res = _solver.solve(cube, conflict_limit)
+    return cube, res, time.time() - start_time, _solver.conflicts - conflicts
+
+
+def solve_cubes(sentence, num_vars, workers, depth=PARAMS_CUBE_DEPTH):
+    """
+    Cube-and-conquer. The formula is split into cubes up to the given depth, solved by a pool of workers.
+    A cube exceeding its conflict budget is split again, its parts get twice the budget.
+    Returns a SAT or UNSAT Result.
+    """
+    global _solver
+    splitter = Splitter(CDCL(sentence, num_vars))
+    if not splitter.cdcl.solve_unary_lits():
+        return Result(Result.UNSAT)
+    cubes = splitter.split([], depth)
+    if splitter.cdcl.unsat:
+        return Result(Result.UNSAT)
+    print("Cubes:", len(cubes), "of depth", depth)
+
+    ctx = worker_context()
+    if ctx.get_start_method() == "fork":
+        # Forked workers start from a copy of the preprocessed splitter solver
+        _solver = splitter.cdcl
+    results = queue.Queue()
+    solved = 0
+    with ctx.Pool(workers, initializer=init_worker, initargs=(sentence, num_vars)) as pool:
+        def submit(cube, conflict_limit):
+            pool.apply_async(solve_cube, (cube, conflict_limit),
+                             callback=lambda r: results.put((r, conflict_limit)),
+                             error_callback=lambda e: results.put((e, conflict_limit)))
+
+        for cube in cubes:
+            submit(cube, PARAMS_CUBE_CONFLICTS)
+        pending = len(cubes)
+        while pending > 0:
+            result, conflict_limit = results.get()
+            pending -= 1
+            if isinstance(result, BaseException):
+                raise result
+            cube, res, cube_time, conflicts = result
+            solved += 1
+            print(f"cube {solved} {cube}: {res.status} in {cube_time:.2f}s, {conflicts} conflicts")
+            if res.status == Result.SAT:
+                return res
+            if res.status == Result.UNKNOWN:
+                parts = splitter.split(cube, PARAMS_CUBE_RESPLIT_DEPTH)
+                for part in parts:
+                    submit(part, 2 * conflict_limit)
+                pending += len(parts)
+    return Result(Result.UNSAT)
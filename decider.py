@@ -1,62 +1,85 @@
-import numpy as np
 import math
 from dpq import DynamicPriorityQueue
 
 
 class decider:
-    def update_scores(self):
+    def update_scores(self, learned_clause, conflict, reasons):
         pass
 
-    def on_assign(self):
+    def on_assign(self, literal):
         pass
 
-    def on_unassign(self):
+    def on_unassign(self, literal):
         pass
 
+    def on_unassign_all(self, literals):
+        """
+        Notify the unassignment of all literals removed by a backtrack, the most recent one first.
+        """
+        for lit in literals:
+            self.on_unassign(lit)
+
     def decide(self):
         pass
 
 
-class VSIDS(decider):
+class LiteralHeapDecider(decider):
     """
-    VSIDS heuristic
-
-    Using a list to store score of each variable. Using heap can possibly optimize handling with a lot of variables.
+    Base of the heuristics scoring each literal.
+    The literals are kept in an order heap. Literals of assigned variables are not removed on assignment,
+      they are lazily skipped at decide time and pushed back on unassignment.
     """
 
-    def __init__(self, scores, num_vars, decay=0.95):
-        # Assign default score with 1.
-        # Negative score means the literal has assignment.
-        self.scores = scores
+    def __init__(self, num_vars, literals, scores):
         self.num_vars = num_vars
-        self.r_decay = 1 / decay
-        self.one = 1
+        self.literals = literals
+        self.heap = DynamicPriorityQueue(2 * num_vars + 1)
+        lits = [lit for v in range(1, num_vars + 1) for lit in (v, -v)]
+        for lit in lits:
+            self.heap.scores[lit] = scores[lit]
+        self.heap.build(lits)
 
     def decide(self):
         """
         Decide the next literal to assign based on the max score.
         """
-        ret = np.argmax(self.scores)
-        # ret > self.num_vars: negative literal
-        if ret > self.num_vars:
-            return ret - (2 * self.num_vars + 1)
-        return ret
-
-    def on_assign(self, literal):
-        """
-        Change sign of the literal's score. (+ => -)
-        """
-        #assert self.scores[literal] > 0
-        self.scores[literal] = -self.scores[literal]
-        self.scores[-literal] = -self.scores[-literal]
+        values = self.literals.values
+        heap = self.heap
+        lit = heap.pop()
+        while values[abs(lit)] != 0:
+            lit = heap.pop()
+        return lit
 
     def on_unassign(self, literal):
+        self.heap.push(literal)
+        self.heap.push(-literal)
+
+    def on_unassign_all(self, literals):
+        push = self.heap.push
+        for lit in literals:
+            push(lit)
+            push(-lit)
+
+    def bump(self, literal, inc):
         """
-        Change sign of the literal's score. (- => +)
+        Add inc to the score of the literal.
         """
-        #assert self.scores[literal] < 0
-        self.scores[literal] = -self.scores[literal]
-        self.scores[-literal] = -self.scores[-literal]
+        heap = self.heap
+        heap.scores[literal] += inc
+        heap.update(literal)
+        return heap.scores[literal]
+
+
+class VSIDS(LiteralHeapDecider):
+    """
+    VSIDS heuristic
+    """
+
+    def __init__(self, scores, num_vars, literals, decay=0.95):
+        # Assign default score with the occurrence count.
+        super().__init__(num_vars, literals, scores)
+        self.r_decay = 1 / decay
+        self.one = 1
 
     def update_scores(self, learned_clause, conflict, reasons):
         """
@@ -64,73 +87,33 @@ class VSIDS(decider):
         """
         mx = 0
 
-        for lit in learned_clause.literals:
-            if self.scores[lit] > 0:
-                self.scores[lit] += self.one
-            else:
-                self.scores[lit] -= self.one
-            mx = max(mx, abs(self.scores[lit]))
+        for lit in learned_clause:
+            mx = max(mx, self.bump(lit, self.one))
 
         self.one *= self.r_decay
         if mx > 1e6:
-            for lit, _ in enumerate(self.scores):
-                if abs(self.scores[lit]) > 1e-10:
-                    self.scores[lit] = self.scores[lit] / self.one
+            self.heap.rescale(1 / self.one)
             self.one = 1
-        # for lit, _ in enumerate(self.scores):
-        #    self.scores[lit] = self.scores[lit] * self.decay
 
 
-class EVSIDS:
-    def __init__(self, scores, num_vars, g=1.2):
-        # Assign default score with 1.
-        # Negative score means the literal has assignment.
+class EVSIDS(LiteralHeapDecider):
+    def __init__(self, scores, num_vars, literals, g=1.2):
+        # Assign default score with the occurrence count.
+        super().__init__(num_vars, literals, scores)
         self.EXCEED_LIMIT = 10000
-        self.scores = scores
-        self.num_vars = num_vars
         self.g = g
         self.inc = g
 
-    def decide(self):
-        """
-        Decide the next literal to assign based on the max score.
-        """
-        ret = np.argmax(self.scores)
-        # ret > self.num_vars: negative literal
-        if ret > self.num_vars:
-            return ret - (2 * self.num_vars + 1)
-        return ret
-
-    def on_assign(self, literal):
-        """
-        Change sign of the literal's score. (+ => -)
-        """
-        self.scores[literal] = -self.scores[literal]
-        self.scores[-literal] = -self.scores[-literal]
-
-    def on_unassign(self, literal):
-        """
-        Change sign of the literal's score. (- => +)
-        """
-        self.scores[literal] = -self.scores[literal]
-        self.scores[-literal] = -self.scores[-literal]
-
     def update_scores(self, learned_clause, conflict, reasons):
         """
         +1 for literals in learned_clause. Apply decay on each literal.
         """
-        for lit in learned_clause.literals:
-            if self.scores[lit] > 0:
-                self.scores[lit] += self.inc
-            else:
-                self.scores[lit] -= self.inc
+        for lit in learned_clause:
+            self.bump(lit, self.inc)
 
         self.inc *= self.g
         if self.inc > self.EXCEED_LIMIT:
-            f = self.g / self.inc
-            for lit, _ in enumerate(self.scores):
-                if abs(self.scores[lit]) > 1e-10:
-                    self.scores[lit] *= f
+            self.heap.rescale(self.g / self.inc)
             self.inc = self.g
 
 
@@ -139,35 +122,54 @@ class LRB(decider):
     Learn Rate Branch heuristic
 
     https://www.ac.tuwien.ac.at/files/pub/Liang2016.pdf
+
+    The locality decay of unassigned variables is applied lazily:
+      the heap stores ema * inc, and inc grows by 1 / decay on every conflict.
+    Assigned variables keep their ema in frozen and are skipped at decide time.
     """
     class Strategy:
         CONFLICT_SIDE = "CONFLICT_SIDE"
         CONFLICT_CLAUSE = "CONFLICT_CLAUSE"
 
-    def __init__(self, num_vars, scores, alpha=0.4, alpha_lim=0.06, epsilon=1e-6, decay=0.95, strategy=Strategy.CONFLICT_SIDE):
+    RESCALE_LIMIT = 1e100
+
+    class Phase:
+        SAVED = "SAVED"
+        OCCURRENCE = "OCCURRENCE"
+        POSITIVE = "POSITIVE"
+        NEGATIVE = "NEGATIVE"
+
+    def __init__(self, num_vars, scores, literals, alpha=0.4, alpha_lim=0.06, epsilon=1e-6, decay=0.95, strategy=Strategy.CONFLICT_SIDE, phase=Phase.SAVED, rng=None):
         self.alpha = alpha
         self.beta = 1 - alpha
         self.alpha_lim = alpha_lim
         self.epsilon = epsilon
         self.learnt_counter = 1
         self.num_vars = num_vars
-        self.ema = DynamicPriorityQueue()
-        for v in range(1, num_vars + 1):
-            self.ema.setVal(v, 1e-10)
-        self.assigned = np.zeros(num_vars + 1)
-        self.participated = np.zeros(num_vars + 1)
+        self.literals = literals
+        self.ema = DynamicPriorityQueue(num_vars + 1, 1e-10)
+        if rng is not None:
+            # Break the ties of the initial order at random
+            for v in range(1, num_vars + 1):
+                self.ema.scores[v] *= 1 + rng.random()
+        self.ema.build(range(1, num_vars + 1))
+        self.inc = 1.0
+        self.frozen = [0.0] * (num_vars + 1)
+        self.assigned = [0] * (num_vars + 1)
+        self.participated = [0] * (num_vars + 1)
         # Extension: RSR
-        self.reasoned = np.zeros(num_vars + 1)
+        self.reasoned = [0] * (num_vars + 1)
         # Phase-saving, see: https://link.springer.com/content/pdf/10.1007/978-3-540-72788-0_28.pdf
-        self.phase_saving = np.zeros(num_vars + 1, dtype=int)
+        self.phase_saving = [0] * (num_vars + 1)
         self.scores = scores
         self.decay = decay
         self.strategy = strategy
+        self.phase = phase
 
     def update_scores(self, clause, conflict, reasons):
         self.learnt_counter += 1
         clause_vars = set()
-        for v in clause.literals:
+        for v in clause:
             v = abs(v)
             self.participated[v] += 1
             self.reasoned[v] -= 1   # Extension: RSR
@@ -180,21 +182,22 @@ class LRB(decider):
             self.alpha -= self.epsilon
         # Extension: RSR
         for lc in reasons:
-            for v in lc.literals:
+            for v in lc:
                 v = abs(v)
                 if v not in clause_vars:
                     self.reasoned[v] += 1
                     clause_vars.add(v)
         # Extension: Locality
-        self.ema.decay(self.decay)
+        self.inc /= self.decay
+        if self.inc > self.RESCALE_LIMIT:
+            self.ema.rescale(1 / self.inc)
+            self.inc = 1.0
 
     def on_assign(self, v):
         v = abs(v)
         self.assigned[v] = self.learnt_counter
         self.participated[v] = 0
-        orig_ema = self.ema.getVal(v)
-        #assert orig_ema >= 0
-        self.ema.setVal(v, -orig_ema)
+        self.frozen[v] = self.ema.scores[v] / self.inc
         self.reasoned[v] = 0
 
     def on_unassign(self, v):
@@ -203,89 +206,75 @@ class LRB(decider):
         interval = self.learnt_counter - self.assigned[v]
         if interval > 0:
             r = self.participated[v] / interval
-            orig_ema = -self.ema.getVal(v)
-            #assert orig_ema >= 0
             rsr = self.reasoned[v] / interval
-            self.ema.setVal(v, self.beta *
-                            orig_ema + self.alpha * (r + rsr))
+            ema = self.beta * self.frozen[v] + self.alpha * (r + rsr)
         else:
-            orig_ema = -self.ema.getVal(v)
-            #assert orig_ema >= 0
-            self.ema.setVal(v, orig_ema)
+            ema = self.frozen[v]
+        self.ema.scores[v] = ema * self.inc
+        if v in self.ema:
+            self.ema.update(v)
+        else:
+            self.ema.push(v)
 
     def decide(self):
-        l = self.ema.top()
-        if self.phase_saving[l] != 0:
+        values = self.literals.values
+        ema = self.ema
+        l = ema.pop()
+        while values[l] != 0:
+            l = ema.pop()
+        if self.phase == self.Phase.POSITIVE:
+            return l
+        if self.phase == self.Phase.NEGATIVE:
+            return -l
+        if self.phase == self.Phase.SAVED and self.phase_saving[l] != 0:
             return self.phase_saving[l]
         if self.scores[l] > self.scores[-l]:
             return l
         return -l
 
 
-class CHB:
+class CHB(LiteralHeapDecider):
     """
     Conflict History-based Branching heuristic
+
+    https://dl.acm.org/doi/10.5555/3016100.3016385
+    Only the variables involved in a conflict are rewarded, keyed by their assigned literal.
     """
 
-    def __init__(self, num_vars, trail, step_chb=0.4, step_min_chb=0.06, step_dec_chb=1e-6):
+    def __init__(self, num_vars, literals, step_chb=0.4, step_min_chb=0.06, step_dec_chb=1e-6):
+        # scores close to 0
+        super().__init__(num_vars, literals, [1e-3] * (2 * num_vars + 1))
         self.step_chb = step_chb
         self.step_dec_chb = step_dec_chb
         self.step_min_chb = step_min_chb
-        self.num_vars = num_vars
-        # scores close to 0
-        self.scores = [1e-3] * (2 * num_vars + 1)
-        self.scores[0] = 0
-        self.trail = trail
         self.conflicts = 0
-        self.last_conflict = [0] * (2 * num_vars + 1)
-
-    def decide(self):
-        """
-        Decide the next literal to assign based on the max score.
-        """
-        ret = np.argmax(self.scores)
-
-        # ret > self.num_vars: negative literal
-        if ret > self.num_vars:
-            return ret - (2 * self.num_vars + 1)
-
-        return ret
-
-    def on_assign(self, literal):
-        """
-        Change sign of the literal's score. (+ => -)
-        """
-        self.scores[literal] = -self.scores[literal]
-        self.scores[-literal] = -self.scores[-literal]
-
-    def on_unassign(self, literal):
-        """
-        Change sign of the literal's score. (- => +)
-        """
-        self.scores[literal] = -self.scores[literal]
-        self.scores[-literal] = -self.scores[-literal]
+        self.last_conflict = [0] * (num_vars + 1)
+        # stamps[v] == conflicts marks the variables already rewarded for this conflict
+        self.stamps = [0] * (num_vars + 1)
 
     def update_scores(self, learned_clause, conflict, reasons):
         """
-        +1 for literals in learned_clause. Apply decay on each literal.
+        Reward the variables of the learned clause, the conflict and the reasons.
         """
         self.conflicts += 1
-        for lit in self.trail.stack:
-            multiplier = 1
-            if lit in conflict:
-                multiplier = 0.9
-            rew = multiplier / (self.conflicts - self.last_conflict[lit] + 1)
-
-            if self.scores[lit] > 0:
-                self.scores[lit] = (1 - self.step_chb) * \
-                    self.scores[lit] + self.step_chb * rew
-            else:
-                self.scores[lit] = (1 - self.step_chb) * \
-                    self.scores[lit] - self.step_chb * rew
-
-        for c in reasons:
-            for lit in c.literals:
-                self.last_conflict[lit] = self.conflicts
+        conflicts = self.conflicts
+        stamps = self.stamps
+        last_conflict = self.last_conflict
+        values = self.literals.values
+        heap = self.heap
+        scores = heap.scores
+        step = self.step_chb
+        for lits in (learned_clause, conflict, *reasons):
+            for lit in lits:
+                v = abs(lit)
+                if stamps[v] == conflicts:
+                    continue
+                stamps[v] = conflicts
+                rew = 1 / (conflicts - last_conflict[v] + 1)
+                last_conflict[v] = conflicts
+                lit = v if values[v] > 0 else -v
+                scores[lit] = (1 - step) * scores[lit] + step * rew
+                heap.update(lit)
 
         if self.step_chb > self.step_min_chb:
             self.step_chb -= self.step_dec_chb
@@ -1,91 +1,117 @@
+from array import array
+
+import numpy as np
+
+
 class DynamicPriorityQueue():
     """
-    Dynamic priority queue from CSDN
+    Indexed binary max-heap.
+    Keys are integers in [-size/2, size/2] (negative keys wrap around like the literal-indexed lists).
+    scores[key] is the priority of key, indices[key] is its position in heap or -1 if absent.
+    Changing a score must be followed by update(key) if the key is in the heap.
     """
 
-    def __init__(self):
-        self.A = []  # 真实数据存储在一维数组中，每个节点[key, value], value代表优先级
-        self.mapping = {}  # 存储每个节点在一维数组中的位置，字典每项：[key, position]
+    def __init__(self, size, score=0.0):
+        self.heap = []
+        self.scores = array('d', [score]) * size
+        self.indices = array('i', [-1]) * size
 
-    def top(self):  # 返回队列头部元素 min
-        if len(self.A) == 0:
-            return None
-        return self.A[0][0]
+    def __len__(self):
+        return len(self.heap)
 
-    def pop(self):  # 最小元素出队，同时调整队列
-        self.A[0], self.A[-1] = self.A[-1], self.A[0]  # 将队头队尾交换
-        key = self.A[0][0]
-        del self.mapping[key]  # 字典中删除队头节点对应的项
-        self.A.pop()  # 删除队尾
-        self.siftDown_(0)  # 将新的队头shift down
+    def __contains__(self, key):
+        return self.indices[key] >= 0
 
-    def siftUp_(self, i):  # 上浮操作，将优先级较低的节点上浮，用于队尾插入新的节点 或 手动降低某些节点的优先级后的调整
-        l = len(self.A)
-        # 如果当前节点优先级 < 父节点优先级
-        while 0 < i < l and self.A[(i - 1) // 2][1] <= self.A[i][1]:
-            # 将当前节点与父节点交换
-            self.A[(i - 1) // 2], self.A[i] = self.A[i], self.A[(i - 1) // 2]
-            self.mapping[self.A[i][0]] = i  # 更新A[i]新的位置
-            self.mapping[self.A[(i-1)//2][0]] = (i-1)//2  # 更新A[(i-1)/2]新的位置
-            i = (i - 1) // 2  # 继续遍历父节点
-        return i
+    def top(self):
+        if len(self.heap) == 0:
+            return None
+        return self.heap[0]
 
-    def siftDown_(self, i):  # 下沉操作，将优先级较高的节点下沉，用于队头出队后队尾换到队头时 或 手动升高某些节点优先级后的调整
-        l = len(self.A)
-        while 2 * i + 1 < l:
-            min_child, l_child, r_child = i, 2 * i + 1, 2 * i + 2
-            # 确定左右孩子节点中优先级最小的节点
-            if l_child < l and self.A[l_child][1] >= self.A[min_child][1]:
-                min_child = l_child
-            if r_child < l and self.A[r_child][1] >= self.A[min_child][1]:
-                min_child = r_child
-            # 如果当前节点优先级大于孩子节点，则交换，并更新mapping
-            if min_child > i:
-                self.A[i], self.A[min_child] = self.A[min_child], self.A[i]
-                self.mapping[self.A[i][0]] = i   # 更新A[i]新的位置
-                # 更新A[min_child]新的位置
-                self.mapping[self.A[min_child][0]] = min_child
-            else:
-                break
-            i = min_child
+    def push(self, key):
+        if self.indices[key] >= 0:
+            return
+        self.heap.append(key)
+        self.indices[key] = len(self.heap) - 1
+        self.sift_up(len(self.heap) - 1)
 
-        return i
+    def build(self, keys):
+        """
+        Replace the content of the heap with keys in linear time.
+        """
+        for key in self.heap:
+            self.indices[key] = -1
+        self.heap = list(keys)
+        for i, key in enumerate(self.heap):
+            self.indices[key] = i
+        for i in range(len(self.heap) // 2 - 1, -1, -1):
+            self.sift_down(i)
 
-    def push(self, key, val):
-        self.A.append([key, val])  # 追加新的节点
-        self.mapping[key] = len(self.A) - 1  # 初始放到队尾的位置
-        return self.siftUp_(len(self.A) - 1)  # 最终位置根据调整情况确定
+    def pop(self):
+        """
+        Remove and return the key with the highest score.
+        """
+        heap = self.heap
+        key = heap[0]
+        last = heap.pop()
+        self.indices[key] = -1
+        if len(heap) > 0:
+            heap[0] = last
+            self.indices[last] = 0
+            self.sift_down(0)
+        return key
 
-    def getVal(self, key):  # 获取某个节点的优先级
-        if key not in self.mapping:
-            return -1
-        else:
-            pos = self.mapping[key]  # 先拿到这个节点的位置
-            return self.A[pos][1]  # 再获取这个节点的优先级
+    def update(self, key):
+        """
+        Restore the heap property after the score of key changed.
+        """
+        i = self.indices[key]
+        if i >= 0:
+            self.sift_down(self.sift_up(i))
 
-    def setVal(self, key, val):  # 修改已有节点
-        if key not in self.mapping:
-            self.push(key, val)
-        else:
-            pos = self.mapping[key]
-            self.A[pos][1] = val
-            pos = self.siftUp_(pos)
-            pos = self.siftDown_(pos)
+    def sift_up(self, i):
+        heap = self.heap
+        scores = self.scores
+        indices = self.indices
+        key = heap[i]
+        score = scores[key]
+        while i > 0:
+            parent = (i - 1) >> 1
+            p = heap[parent]
+            if scores[p] >= score:
+                break
+            heap[i] = p
+            indices[p] = i
+            i = parent
+        heap[i] = key
+        indices[key] = i
+        return i
 
-    def remove(self, key):  # 删除已有节点
-        if key in self.mapping:
-            pos = self.mapping[key]
-            self.A[pos], self.A[-1] = self.A[-1], self.A[pos]
-            self.mapping[self.A[pos][0]] = pos   # 更新A[pos]新的位置
-            self.A.pop()
-            del self.mapping[key]
-            pos = self.siftUp_(pos)
-            pos = self.siftDown_(pos)
+    def sift_down(self, i):
+        heap = self.heap
+        scores = self.scores
+        indices = self.indices
+        n = len(heap)
+        key = heap[i]
+        score = scores[key]
+        while True:
+            child = 2 * i + 1
+            if child >= n:
+                break
+            if child + 1 < n and scores[heap[child + 1]] > scores[heap[child]]:
+                child += 1
+            c = heap[child]
+            if scores[c] <= score:
+                break
+            heap[i] = c
+            indices[c] = i
+            i = child
+        heap[i] = key
+        indices[key] = i
+        return i
 
-    def decay(self, decay):
+    def rescale(self, factor):
         """
-        LRB algorithm (Extension: Locality)
+        Multiply every score by factor. The order of the heap is unchanged.
         """
-        for x in self.A:
-            if x[1] > 0:
-                x[1] *= decay
+        # In-place on the array buffer, no copy.
+        np.frombuffer(self.scores, dtype=np.float64)[:] *= factor
@@ -9,6 +9,8 @@ class Literals:
         *: Assume that all variables are numbered > 0.
         """
         self.values = [0] * (num_vars + 1)
+        # Value of each literal, indexed by the literal itself (negative literals wrap around).
+        self.lit_values = [0] * (2 * num_vars + 1)
         self.levels = [0] * (num_vars + 1)
         self.reasons = [None] * (num_vars + 1)
 
@@ -19,20 +21,26 @@ class Literals:
         #assert self.values[abs(literal)] == 0
         lit = abs(literal)
         self.values[lit] = 1 if literal > 0 else -1
+        self.lit_values[literal] = 1
+        self.lit_values[-literal] = -1
         self.levels[lit] = level
         self.reasons[lit] = reason
 
-    def unassign(self, literal):
+    def unassign_all(self, literals):
         """
-        Cancel the assignment on the variable.
+        Cancel the assignments on all the given literals.
         """
-        ret = (self.reasons[literal] != None)
-        literal = abs(literal)
-        #assert self.values[literal] != 0
-        self.values[literal] = 0
-        self.levels[literal] = 0
-        self.reasons[literal] = None
-        return ret
+        values = self.values
+        lit_values = self.lit_values
+        levels = self.levels
+        reasons = self.reasons
+        for literal in literals:
+            literal = abs(literal)
+            values[literal] = 0
+            lit_values[literal] = 0
+            lit_values[-literal] = 0
+            levels[literal] = 0
+            reasons[literal] = None
 
     def get(self, literal):
         """
@@ -56,11 +64,7 @@ class Literals:
         """
         literal = abs(literal)
         #assert Literal._values[literal] != 0
-        ret = self.reasons[literal]
-        if ret != None:
-            while ret.subsumed != None:
-                ret = ret.subsumed
-        return ret
+        return self.reasons[literal]
 
     def sat(self, literal):
         """
@@ -70,3 +74,20 @@ class Literals:
         if literal == None:
             return False
         return self.values[abs(literal)] * literal > 0
+
+
+def binary_reason(literal):
+    """
+    Encode the antecedent of an implication by a binary clause.
+    Clause references are non-negative, so a binary antecedent is stored as a negative number
+      holding the other (false) literal of the binary clause.
+    """
+    return -2 * literal if literal > 0 else 2 * literal - 1
+
+
+def binary_reason_literal(reason):
+    """
+    Decode the other literal of a binary antecedent.
+    """
+    reason = -reason
+    return -(reason >> 1) if reason & 1 else reason >> 1
@@ -1,8 +1,19 @@
 import argparse
+import cProfile
+import json
+import os
+import pstats
+import sys
 import time
 
+from batch import solve_batch
 from cdcl import CDCL
-from utils import read_cnf
+from cube import solve_cubes
+from portfolio import solve_portfolio, worker_config
+from profiler import Profiler, SamplingProfiler
+from proof import Proof
+from result import Result
+from utils import open_cnf, read_cnf, write_model
 
 
 def parse_args():
@@ -10,30 +21,183 @@ def parse_args():
     parser.add_argument(
         "-i", "--input", type=str, default="examples/test.cnf"
     )
+    parser.add_argument(
+        "--portfolio", type=int, default=1, metavar="N",
+        help="run N diversified solvers in parallel, sharing learned clauses"
+    )
+    parser.add_argument(
+        "--cube", type=int, default=0, metavar="N",
+        help="cube-and-conquer with N worker processes"
+    )
+    parser.add_argument(
+        "--json", type=str, metavar="FILE",
+        help="write the statistics of the run to FILE as JSON"
+    )
+    parser.add_argument(
+        "--profile", nargs="?", const="wrap", choices=["wrap", "cprofile", "sample"],
+        help="time the solver subsystems, optionally under cProfile or a sampling profiler"
+    )
+    parser.add_argument(
+        "--profile-output", type=str, default="profile", metavar="PREFIX",
+        help="prefix of the profile files (.folded collapsed stacks, .pstats)"
+    )
+    parser.add_argument(
+        "--time-limit", type=float, metavar="SEC",
+        help="give up with UNKNOWN (exit code 0) after SEC seconds, preprocessing included"
+    )
+    parser.add_argument(
+        "--conflict-limit", type=int, metavar="N",
+        help="give up with UNKNOWN after N conflicts"
+    )
+    parser.add_argument(
+        "--propagation-limit", type=int, metavar="N",
+        help="give up with UNKNOWN after N propagations"
+    )
+    parser.add_argument(
+        "--memory-limit", type=float, metavar="MB",
+        help="give up with UNKNOWN when the clause database exceeds MB megabytes"
+    )
+    parser.add_argument(
+        "--proof", type=str, metavar="FILE",
+        help="write a DRAT proof of UNSAT to FILE (gzip-compressed if it ends with .gz, or a named pipe)"
+    )
+    parser.add_argument(
+        "--proof-format", choices=["binary", "text"], default="binary",
+        help="DRAT proof format"
+    )
+    parser.add_argument(
+        "--batch", type=str, metavar="DIR|LIST",
+        help="solve the instances of a directory or list file, streaming JSON Lines records"
+    )
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=os.cpu_count() or 1, metavar="N",
+        help="worker processes of --batch"
+    )
+    parser.add_argument(
+        "--batch-output", type=str, metavar="FILE",
+        help="write the --batch records to FILE instead of the standard output"
+    )
+
+    args = parser.parse_args()
+    if args.profile and (args.cube > 0 or args.portfolio > 1):
+        parser.error("--profile only profiles a single solver")
+    if args.cube > 0 and budgets(args):
+        parser.error("budgets do not apply to --cube, whose cubes have their own conflict budgets")
+    if args.proof and (args.cube > 0 or args.portfolio > 1):
+        parser.error("--proof only applies to a single solver")
+    if args.batch and (args.cube > 0 or args.portfolio > 1 or args.profile or args.proof):
+        parser.error("--batch solves each instance with a single solver, without profile or proof")
+    return args
+
+
+def budgets(args):
+    """
+    Keyword arguments of solve() for the budgets given on the command line.
+    """
+    limits = {
+        "time_limit": args.time_limit,
+        "conflict_limit": args.conflict_limit,
+        "propagation_limit": args.propagation_limit,
+        "memory_limit": args.memory_limit,
+    }
+    return {name: limit for name, limit in limits.items() if limit is not None}
+
 
-    return parser.parse_args()
+def profile(args, profiler, sampler):
+    """
+    Stop the profilers, print the per-subsystem breakdown and write the profile files.
+    """
+    if args.profile == "cprofile":
+        sampler.disable()
+        sampler.dump_stats(args.profile_output + ".pstats")
+        pstats.Stats(sampler).sort_stats("tottime").print_stats(15)
+    elif args.profile == "sample":
+        sampler.stop()
+        sampler.write_folded(args.profile_output + ".sample.folded")
+    profiler.report()
+    profiler.write_folded(args.profile_output + ".folded")
+
+
+def batch(args):
+    """
+    Solve a batch of instances, with the budgets of the command line for each instance.
+    Returns 1 if an instance failed or got a wrong answer.
+    """
+    start_time = time.time()
+    counts = solve_batch(args.batch, args.jobs, budgets(args), args.batch_output)
+    print(f"c {sum(counts.values())} instances in {time.time() - start_time:.2f}s:",
+          ", ".join(f"{status} {n}" for status, n in sorted(counts.items())), file=sys.stderr)
+    return 1 if counts.get("ERROR") or counts.get("WRONG") else 0
 
 
 def main(args):
+    if args.batch:
+        return batch(args)
     # Create problem.
-    with open(args.input, "r") as f:
+    parse_time = time.time()
+    with open_cnf(args.input) as f:
         sentence, num_vars = read_cnf(f)
+        size = f.tell() / 1e6
+    parse_time = time.time() - parse_time
+    print(f"Parsed {size:.1f} MB in {parse_time:.2f}s ({size / max(parse_time, 1e-9):.1f} MB/s)")
 
     start_time = time.time()
     # Create CDCL solver and solve it!
-    cdcl = CDCL(sentence, num_vars)
-    res = cdcl.solve()
+    cdcl = None
+    summary = {}
+    if args.cube > 0:
+        res = solve_cubes(sentence, num_vars, args.cube)
+    elif args.portfolio > 1:
+        worker, res, summary = solve_portfolio(sentence, num_vars, args.portfolio, budgets(args))
+        print(f"Answer of portfolio worker {worker} ({worker_config(worker)}):", summary["conflicts"],
+              "conflicts,", summary["exported"], "clauses exported,", summary["imported"], "imported")
+    else:
+        if args.profile == "cprofile":
+            sampler = cProfile.Profile()
+            sampler.enable()
+        elif args.profile == "sample":
+            sampler = SamplingProfiler()
+            sampler.start()
+        proof = Proof(args.proof, binary=args.proof_format == "binary") if args.proof else None
+        deadline = None if args.time_limit is None else time.perf_counter() + args.time_limit
+        cdcl = CDCL(sentence, num_vars, proof=proof, deadline=deadline)
+        cdcl.stats.times["parse"] = parse_time
+        if args.profile:
+            profiler = Profiler()
+            profiler.install(cdcl)
+        limits = budgets(args)
+        if deadline is not None:
+            # The time budget also covers the preprocessing done by the constructor
+            limits["time_limit"] = max(0.0, deadline - time.perf_counter())
+        res = cdcl.solve(**limits)
+        if args.profile:
+            profile(args, profiler, sampler if args.profile != "wrap" else None)
+        if proof is not None:
+            proof.close()
+            print(f"c proof: {proof.added} clauses added, {proof.deleted} deleted")
 
-    if res is None:
+    if res.status == Result.UNSAT:
         print("✘ No solution found")
+    elif res.status == Result.UNKNOWN:
+        print(f"? Unknown, the {res.reason} budget is exhausted")
     else:
         print(f"✔ Successfully found a solution")
-        with open("output.log", "w") as o:
-            o.write(str(res))
+        write_model("output.log", res.model)
     end_time = time.time()
+    if cdcl is not None:
+        cdcl.stats.print_summary(cdcl)
+        summary = cdcl.stats.summary(cdcl)
+    if args.json:
+        summary["status"] = res.status
+        if res.reason is not None:
+            summary["reason"] = res.reason
+        summary["wall_time"] = end_time - start_time
+        with open(args.json, "w") as o:
+            json.dump(summary, o, indent=2)
     print("time: "+str(end_time-start_time)+"s")
+    return res.exit_code()
 
 
 if __name__ == "__main__":
     args = parse_args()
-    main(args)
+    sys.exit(main(args))
@@ -31,13 +31,114 @@ PARAMS_LRB_ALPHA_EPSILON = 1e-6
 PARAMS_LRB_DECAY = 0.95
 ### Valid options: "CONFLICT_CLAUSE" ('incorrect' implementation), "CONFLICT_SIDE" (original implementation)
 PARAMS_LRB_STRATEGY = "CONFLICT_SIDE"
+### Valid options: "SAVED" (phase saving, else most frequent polarity), "OCCURRENCE" (most frequent polarity), "POSITIVE", "NEGATIVE"
+PARAMS_LRB_PHASE = "SAVED"
 HEURISTIC_ENABLE_LRB = True
 ## CHB
 PARAMS_CHB_STEP = 0.4
 PARAMS_CHB_STEP_MIN = 0.06
 PARAMS_CHB_STEP_DECAY = 1e-6
-PARAMS_REDUCE_LIM = 300
 HEURISTIC_ENABLE_CHB = False
 
+## Random seed breaking the ties of the initial variable order, None keeps the occurrence order
+PARAMS_SEED = None
+
+# Learned clause database
+## Conflicts before the first reduction, the interval grows geometrically
+PARAMS_REDUCE_LIM = 300
+PARAMS_REDUCE_GROWTH = 1.1
+## Glue limits of the core and tier2 tiers
+PARAMS_REDUCE_TIER1_GLUE = 2
+PARAMS_REDUCE_TIER2_GLUE = 6
+
+# Level-0 simplification
+## Minimum number of conflicts between two simplifications
+PARAMS_SIMPLIFY_INTERVAL = 1000
+
 # Subsumption
 ENABLE_SUBSUMPTION_ON_THE_FLY = True
+
+# Clause arena
+## Compact the arena after reduce() once this fraction of it is wasted
+PARAMS_ARENA_GC_FRACTION = 0.2
+
+# Learned clause minimization
+## Glucose binary implication minimization, only for learned clauses up to this size
+ENABLE_MINIMIZE_BINARY = True
+PARAMS_MINIMIZE_BINARY_MAX_SIZE = 30
+
+# Bounded variable elimination
+## Number of clauses an elimination may add
+PARAMS_BVE_GROW = 0
+## Longest resolvent allowed
+PARAMS_BVE_RESOLVENT_LIMIT = 20
+## Largest product of positive and negative occurrences tried
+PARAMS_BVE_OCC_LIMIT = 400
+
+# Subsumption in preprocessing
+## Maximum number of clause pairs compared per run
+PARAMS_SUBSUMPTION_BUDGET = 1000000
+
+# Preprocessing
+## Clauses indexed between two checks of the deadline
+PARAMS_PREPROCESS_CHECK_INTERVAL = 4096
+
+# Failed literal probing
+ENABLE_PROBING = True
+## Propagations allowed per probing round
+PARAMS_PROBE_BUDGET = 20000
+## Hyper-binary resolvents learned per probing round
+PARAMS_PROBE_HBR_LIMIT = 1000
+## Conflicts between probing rounds at restarts, grows with each round
+PARAMS_PROBE_INTERVAL = 2000
+
+# Resource budgets of a solve() call, None for no limit
+## An exhausted budget ends the search with an UNKNOWN result, checked before each propagation
+## Seconds
+PARAMS_BUDGET_TIME = None
+PARAMS_BUDGET_CONFLICTS = None
+PARAMS_BUDGET_PROPAGATIONS = None
+## Size of the clause arena, in MB
+PARAMS_BUDGET_MEMORY = None
+
+# DRAT proof
+## Binary DRAT format, text DRAT otherwise
+PARAMS_PROOF_BINARY = True
+## Bytes buffered before each write
+PARAMS_PROOF_BUFFER = 1 << 20
+## Compression level of .gz proofs, low levels keep up with the solver
+PARAMS_PROOF_GZIP_LEVEL = 1
+
+# Portfolio
+## Learned clauses shared between workers
+PARAMS_SHARE_GLUE = 2
+PARAMS_SHARE_SIZE = 8
+## Slots of the ring buffer of each worker
+PARAMS_SHARE_BUFFER = 1 << 16
+## Parameters overridden by each worker, worker i uses PARAMS_PORTFOLIO_CONFIGS[i % len] and seed i
+PARAMS_PORTFOLIO_CONFIGS = [
+    {},
+    {"HEURISTIC_ENABLE_LRB": False, "HEURISTIC_ENABLE_CHB": True},
+    {"PARAMS_RESTARTER": "LUBY"},
+    {"HEURISTIC_ENABLE_LRB": False, "HEURISTIC_ENABLE_EVSIDS": True},
+    {"PARAMS_LRB_PHASE": "NEGATIVE"},
+    {"HEURISTIC_ENABLE_VSIDS": True},
+    {"HEURISTIC_ENABLE_LRB": False, "HEURISTIC_ENABLE_CHB": True, "PARAMS_RESTARTER": "LUBY"},
+    {"PARAMS_LRB_PHASE": "OCCURRENCE"},
+]
+
+# Cube-and-conquer
+## Literals of the initial cubes
+PARAMS_CUBE_DEPTH = 4
+## Variables tried by the lookahead at each split
+PARAMS_CUBE_CANDIDATES = 20
+## Conflicts allowed to an initial cube, a cube exceeding it is split again with twice the budget
+PARAMS_CUBE_CONFLICTS = 2000
+## Literals added by a new split
+PARAMS_CUBE_RESPLIT_DEPTH = 2
+
+# Statistics
+## Print a row of the progress table every PARAMS_PROGRESS_CONFLICTS conflicts or PARAMS_PROGRESS_SECONDS seconds
+ENABLE_PROGRESS = True
+PARAMS_PROGRESS_CONFLICTS = 1000
+PARAMS_PROGRESS_SECONDS = 10
@@ -0,0 +1,162 @@
+import time
+import traceback
+from multiprocessing.sharedctypes import RawArray
+
+import numpy as np
+
+import cdcl
+import decider
+import params
+import preprocessor
+import prober
+import restarter
+from params import *
+from result import Result
+from utils import silence_worker, worker_context
+
+
+class ClauseExchange:
+    """
+    Learned clause exchange between the workers of a portfolio.
+    Each worker writes the clauses it shares in its own ring buffer of shared memory and reads the buffers
+      of the others. A clause is stored as its size followed by its literals.
+    heads[w] counts the slots ever written by worker w and is only advanced once a clause is complete.
+      The writer may already be filling the next PARAMS_SHARE_SIZE + 1 slots past heads[w], so a reader
+      only keeps what it copied if that record could not have reached its tail; otherwise it drops the
+      clauses it missed. Records are checked for size and literal range before they are imported.
+    """
+
+    def __init__(self, workers, num_vars, capacity=PARAMS_SHARE_BUFFER):
+        self.workers = workers
+        self.num_vars = num_vars
+        self.capacity = capacity
+        # Slots a reader may be behind the head without being overwritten by a write in progress
+        self.window = capacity - (PARAMS_SHARE_SIZE + 1)
+        self.buffers = [RawArray('i', capacity) for _ in range(workers)]
+        self.heads = RawArray('q', workers)
+        self.worker = None
+
+    def attach(self, worker):
+        """
+        Bind the exchange to the worker running in this process.
+        """
+        self.worker = worker
+        self.views = [np.frombuffer(b, dtype=np.int32) for b in self.buffers]
+        self.tails = [0] * self.workers
+
+    def export(self, literals):
+        buf = self.views[self.worker]
+        capacity = self.capacity
+        head = self.heads[self.worker]
+        buf[head % capacity] = len(literals)
+        for i, lit in enumerate(literals, 1):
+            buf[(head + i) % capacity] = lit
+        self.heads[self.worker] = head + len(literals) + 1
+
+    def receive(self):
+        """
+        Returns the clauses shared by the other workers since the last call.
+        """
+        clauses = []
+        capacity = self.capacity
+        num_vars = self.num_vars
+        for w in range(self.workers):
+            if w == self.worker:
+                continue
+            head = self.heads[w]
+            tail = self.tails[w]
+            self.tails[w] = head
+            if head == tail or head - tail > self.window:
+                continue
+            slots = self.views[w][np.arange(tail, head) % capacity].tolist()
+            if self.heads[w] - tail > self.window:
+                # The writer may have overwritten the slots while they were copied
+                continue
+            i = 0
+            while i < len(slots):
+                size = slots[i]
+                clause = slots[i + 1:i + 1 + size]
+                if not 0 < size <= PARAMS_SHARE_SIZE or len(clause) < size \
+                        or not all(0 < abs(lit) <= num_vars for lit in clause):
+                    # Corrupted record, the rest of the buffer cannot be parsed
+                    break
+                clauses.append(clause)
+                i += size + 1
+        return clauses
+
+
+def configure(config):
+    """
+    Override parameters of params.py in this process.
+    The solver modules import params with *, so the names are replaced in each of them.
+    """
+    for module in (params, cdcl, decider, preprocessor, prober, restarter):
+        for name, value in config.items():
+            if hasattr(module, name):
+                setattr(module, name, value)
+
+
+def worker_config(index):
+    """
+    Parameters of the index-th worker. Workers sharing a configuration differ by their seed.
+    """
+    config = dict(PARAMS_PORTFOLIO_CONFIGS[index % len(PARAMS_PORTFOLIO_CONFIGS)])
+    if index > 0:
+        config["PARAMS_SEED"] = index
+    return config
+
+
+def worker(index, sentence, num_vars, exchange, results, budgets):
+    silence_worker()
+    start = time.perf_counter()
+    try:
+        configure(worker_config(index))
+        exchange.attach(index)
+        deadline = start + budgets["time_limit"] if "time_limit" in budgets else None
+        solver = cdcl.CDCL(sentence, num_vars, deadline=deadline)
+        solver.exchange = exchange
+        if deadline is not None:
+            budgets = dict(budgets, time_limit=max(0.0, deadline - time.perf_counter()))
+        res = solver.solve(**budgets)
+        summary = solver.stats.summary(solver)
+        summary["exported"] = solver.exported
+        summary["imported"] = solver.imported
+        results.put((index, res, None, summary))
+    except Exception:
+        results.put((index, None, traceback.format_exc(), None))
+
+
+def solve_portfolio(sentence, num_vars, workers, budgets=None):
+    """
+    Run workers diversified solvers in parallel and return the first answer,
+      as (worker index, Result, statistics of the worker).
+    The budgets are keyword arguments of the solve() call of each worker.
+      The answer is UNKNOWN only if every worker exhausted its budgets, the last of them is returned.
+    The other workers are terminated.
+    """
+    ctx = worker_context()
+    exchange = ClauseExchange(workers, num_vars)
+    results = ctx.Queue()
+    processes = [ctx.Process(target=worker, args=(i, sentence, num_vars, exchange, results, budgets or {}), daemon=True)
+                 for i in range(workers)]
+    for p in processes:
+        p.start()
+    try:
+        errors = []
+        unknown = None
+        for _ in range(workers):
+            index, res, error, stats = results.get()
+            if error is not None:
+                errors.append(error)
+            elif res.status != Result.UNKNOWN:
+                return index, res, stats
+            else:
+                unknown = index, res, stats
+        if unknown is not None:
+            return unknown
+        raise RuntimeError("all portfolio workers failed:\n" + errors[0])
+    finally:
+        for p in processes:
+            p.terminate()
+        for p in processes:
+            p.join()
@@ -1,3 +1,12 @@
+import math
+import time
+from collections import deque
+
+from dpq import DynamicPriorityQueue
+from params import *
+from proof import Proof
+
+
 def simplify_sentence(sentence):
     """
     Remove already satisfied clauses.
@@ -16,104 +25,258 @@ def simplify_sentence(sentence):
     return simplified
 
 
-def subsumption_eliminate(clauses, num_vars):
-    appearance = {}
-    for i in range(1, num_vars + 1):
-        appearance[i] = set()
-        appearance[-i] = set()
+def subsumption_eliminate(clauses, num_vars, budget=PARAMS_SUBSUMPTION_BUDGET, proof=None, deadline=math.inf):
+    """
+    Backward subsumption and self-subsuming resolution.
+    Each clause C, shortest first, is checked against the clauses containing the variable of C with the fewest occurrences.
+    A pair is only compared if the 64-bit signature of C is included in the signature of the other clause D.
+    If C subsumes D, D is removed. If C with one literal l negated subsumes D, -l is removed from D
+      and D is checked again.
+    At most `budget` pairs are compared. At the deadline (time.perf_counter()) the clauses are returned
+      as simplified so far, or unchanged if the occurrence lists are not complete.
+    Removed and strengthened clauses are logged to the DRAT proof.
+    """
+    start = time.time()
+    clock = time.perf_counter
+    if proof is None:
+        proof = Proof()
+    clauses = list(clauses)
+    occs = [set() for _ in range(num_vars + 1)]
+    signatures = []
     for i, c in enumerate(clauses):
+        if i % PARAMS_PREPROCESS_CHECK_INTERVAL == 0 and clock() >= deadline:
+            return clauses
         for lit in c:
-            appearance[lit].add(i)
-    for i, c in enumerate(clauses):
-        if c == None:
+            occs[abs(lit)].add(i)
+        signatures.append(signature(c))
+
+    queue = deque(sorted(range(len(clauses)), key=lambda i: len(clauses[i])))
+    queued = [True] * len(clauses)
+    checked = 0
+    subsumed = 0
+    strengthened = 0
+    while queue and checked < budget and clock() < deadline:
+        i = queue.popleft()
+        queued[i] = False
+        c = clauses[i]
+        if c is None:
             continue
-        subsumed = appearance[c[0]].copy()
-        for lit in c:
-            subsumed.intersection_update(appearance[lit])
-        subsumed.remove(i)
-        if len(subsumed) > 0:
-            # This clause subsumes other
-            for sc in subsumed:
-                clauses[sc] = None
-    ret = []
-    for c in clauses:
-        if c is not None:
-            ret.append(c)
-    return ret, appearance
+        sig = signatures[i]
+        best = min(c, key=lambda lit: len(occs[abs(lit)]))
+        for j in list(occs[abs(best)]):
+            d = clauses[j]
+            if j == i or d is None or len(d) < len(c) or sig & ~signatures[j]:
+                continue
+            checked += 1
+            lit = subsumes(c, set(d))
+            if lit is None:
+                continue
+            if lit == 0:
+                for l in d:
+                    occs[abs(l)].discard(j)
+                proof.delete(d)
+                clauses[j] = None
+                subsumed += 1
+            elif len(d) > 1:
+                clauses[j] = [l for l in d if l != -lit]
+                proof.add(clauses[j])
+                proof.delete(d)
+                occs[abs(lit)].discard(j)
+                signatures[j] = signature(clauses[j])
+                strengthened += 1
+                if not queued[j]:
+                    queue.append(j)
+                    queued[j] = True
+            if clauses[i] is None:
+                break
 
+    print("Subsumption removed", subsumed, "and strengthened", strengthened,
+          "clauses in", round(time.time() - start, 2), "s.")
+    return [c for c in clauses if c is not None]
 
-def bounded_variable_eliminate(clauses, num_vars):
+
+def signature(clause):
+    """
+    64-bit abstraction of the variables of the clause.
+    """
+    sig = 0
+    for lit in clause:
+        sig |= 1 << (abs(lit) & 63)
+    return sig
+
+
+def subsumes(c, d):
+    """
+    (
+        c: clause
+        d: set of literals of the other clause
+    )
+    Returns 0 if c subsumes d, lit if c with lit negated subsumes d (so -lit can be removed from d), None otherwise.
+    """
+    ret = 0
+    for lit in c:
+        if lit in d:
+            continue
+        if ret == 0 and -lit in d:
+            ret = lit
+            continue
+        return None
+    return ret
+
+
+def bounded_variable_eliminate(clauses, num_vars, grow=PARAMS_BVE_GROW,
+                               resolvent_limit=PARAMS_BVE_RESOLVENT_LIMIT,
+                               occ_limit=PARAMS_BVE_OCC_LIMIT, frozen=(), proof=None, deadline=math.inf):
     """
     (
         clauses: the original clauses list
         num_vars
+        frozen: variables never eliminated, e.g. those of future clauses and assumptions
+        proof: DRAT proof logging the resolvents, then the removed clauses
+        deadline: time.perf_counter() value at which elimination stops, the variables eliminated so far stay so.
+          The clauses are returned unchanged if it is reached while building the occurrence lists.
     )
-    Do elimination at the very beginning only.
-    Eliminate variables which had positively/negatively appeared only once.
+    SatELite-style bounded variable elimination, run to fixpoint.
+    A variable is eliminated by replacing the clauses containing it with all their non-tautological resolvents,
+      as long as this adds at most `grow` clauses and no resolvent is longer than resolvent_limit.
+    Candidates are taken from a priority queue by the product of their positive and negative occurrences,
+      products above occ_limit are not tried.
+    Returns the remaining clauses and the elimination stack, a list of (pivot, clause) entries
+      to be replayed in reverse to extend a model (see CDCL.restore_eliminated_variables).
     https://www.cs.cmu.edu/~mheule/publications/bve-paper.pdf
     """
-    lc_map = [0] * (2 * num_vars + 1)
-    tmp = [0] * (2 * num_vars + 1)
-    # Count variable occurrence
-    for c in clauses:
-        for l in c:
-            lc_map[l] += 1
+    clock = time.perf_counter
+    if proof is None:
+        proof = Proof()
+    clauses = list(clauses)
+    occs = [set() for _ in range(2 * num_vars + 1)]
+    for i, c in enumerate(clauses):
+        if i % PARAMS_PREPROCESS_CHECK_INTERVAL == 0 and clock() >= deadline:
+            return clauses, []
+        for lit in c:
+            occs[lit].add(i)
 
-    # A clause can only be used to eliminate one variable
-    candidates = set()
+    # Units are left to the solver
+    frozen_vars = frozen
+    frozen = [False] * (num_vars + 1)
+    for v in frozen_vars:
+        frozen[abs(v)] = True
     for c in clauses:
-        x = {i: lc_map[-i] for i in c if lc_map[i] == 1}
-        if len(x) == 0:
-            continue
-        # We eliminate the variable with the most occurrence
-        l = max(x, key=x.get)
-        t = set(c)
-        t.remove(l)
-        tmp[l] = t
-        candidates.add(-l)
-
-    # If both v and -v appear in candidates, we should remove one of them
-    removed = set()
-    for c in candidates:
-        if -c in candidates:
-            removed.add(-c)
-    candidates.difference_update(removed)
-    clauses_eliminated = {-l: tmp[-l] for l in candidates}
-
-    ret = []
+        if len(c) == 1:
+            frozen[abs(c[0])] = True
 
-    for c in clauses:
-        if c in clauses_eliminated.values():
-            # c is to be eliminated
-            continue
-        set_c = set(c)
-        itc = set_c.intersection(candidates)
-        if len(itc) > 0:
-            # c should be resolved
-            lit = itc.pop()
-            set_c.remove(lit)
-            new_clause = set_c.union(tmp[-lit])
-            cont = False
-            for l in iter(new_clause):
-                if -l in new_clause:
-                    cont = True
+    # Max-heap on the negated occurrence product
+    queue = DynamicPriorityQueue(num_vars + 1)
+    candidates = []
+    for v in range(1, num_vars + 1):
+        if not frozen[v] and (occs[v] or occs[-v]):
+            queue.scores[v] = -len(occs[v]) * len(occs[-v])
+            candidates.append(v)
+    queue.build(candidates)
+
+    elimination_stack = []
+    eliminated = 0
+    while len(queue) > 0 and clock() < deadline:
+        v = queue.top()
+        if -queue.scores[v] > occ_limit:
+            break
+        queue.pop()
+        pos, neg = occs[v], occs[-v]
+        # Count the resolvents first, give up as soon as the bound is exceeded
+        resolvents = []
+        bound = len(pos) + len(neg) + grow
+        for i in pos:
+            for j in neg:
+                r = resolve(clauses[i], clauses[j], v)
+                if r is None:
+                    continue
+                if len(r) > resolvent_limit or len(r) == 0:
+                    bound = -1
                     break
-            if cont:
-                continue
-            ret.append(list(new_clause))
+                resolvents.append(r)
+                if len(resolvents) > bound:
+                    break
+            if len(resolvents) > bound or bound < 0:
+                break
+        if len(resolvents) > bound or bound < 0:
+            continue
+
+        # Save the clauses of the smaller side to extend the model later
+        if len(pos) > len(neg):
+            saved, pivot = neg, -v
         else:
-            ret.append(c)
+            saved, pivot = pos, v
+        for i in saved:
+            elimination_stack.append((pivot, clauses[i]))
+        elimination_stack.append((-pivot, [-pivot]))
+
+        touched = set()
+        for r in resolvents:
+            proof.add(r)
+        for i in pos | neg:
+            for lit in clauses[i]:
+                occs[lit].discard(i)
+                touched.add(abs(lit))
+            proof.delete(clauses[i])
+            clauses[i] = None
+        for r in resolvents:
+            occs_index = len(clauses)
+            clauses.append(r)
+            for lit in r:
+                occs[lit].add(occs_index)
+                touched.add(abs(lit))
+        eliminated += 1
+
+        touched.discard(v)
+        for u in touched:
+            if frozen[u]:
+                continue
+            queue.scores[u] = -len(occs[u]) * len(occs[-u])
+            if u in queue:
+                queue.update(u)
+            elif occs[u] or occs[-u]:
+                queue.push(u)
+
+    print("BVE eliminated", eliminated, "variables.")
+    return [c for c in clauses if c is not None], elimination_stack
 
-    return ret, clauses_eliminated
+
+def resolve(c1, c2, v):
+    """
+    Resolve c1 (containing v) with c2 (containing -v).
+    Returns None if the resolvent is a tautology.
+    """
+    lits = set(c1)
+    lits.discard(v)
+    for lit in c2:
+        if lit == -v:
+            continue
+        if -lit in lits:
+            return None
+        lits.add(lit)
+    return list(lits)
 
 # GATE-BASED Elimination?
 # http://fmv.jku.at/papers/EenBiere-SAT05.pdf
 
-def preprocess(clauses, num_vars):
+def preprocess(clauses, num_vars, frozen=(), proof=None, deadline=math.inf):
+    """
+    Subsumption keeps the formula equivalent, BVE does not eliminate the frozen variables.
+    Each step is logged to the DRAT proof, if any, and stops at the deadline.
+      The steps not started by the deadline are skipped.
+    """
+    clock = time.perf_counter
     size = len(clauses)
     clauses = simplify_sentence(clauses)
-    #clauses, original_appearance = subsumption_eliminate(clauses, num_vars)
-    clauses, bve_clauses = bounded_variable_eliminate(clauses, num_vars)
-    clauses, _ = subsumption_eliminate(clauses, num_vars)
+    elimination_stack = []
+    if clock() < deadline:
+        clauses = subsumption_eliminate(clauses, num_vars, proof=proof, deadline=deadline)
+    if clock() < deadline:
+        clauses, elimination_stack = bounded_variable_eliminate(clauses, num_vars, frozen=frozen, proof=proof,
+                                                                deadline=deadline)
+    if clock() < deadline:
+        clauses = subsumption_eliminate(clauses, num_vars, proof=proof, deadline=deadline)
+    else:
+        print("Preprocessing stopped at the deadline.")
     print("Preprocessing completed. Eliminated", size - len(clauses), "clauses.")
-    return clauses, bve_clauses
\ No newline at end of file
+    return clauses, elimination_stack
\ No newline at end of file
@@ -0,0 +1,178 @@
+import time
+
+from literal import binary_reason_literal
+from params import *
+
+
+class Prober:
+    """
+    Failed literal probing at level 0.
+    Candidate literals are the roots of the binary implication graph. Each one is assigned at level 1
+      and propagated with the solver's own bcp():
+      - a conflict makes its negation a new unit (failed literal),
+      - a literal implied through a long clause gives a hyper-binary resolvent (see hyper_binary_resolvents),
+      - a literal implied by both polarities of the candidate is a new unit.
+    Each round stops after `budget` propagations, or at the deadline of the solver.
+    A unit implied by both polarities is not implied by propagation alone, the proof gets the two
+      binary clauses it is resolved from first.
+    """
+
+    def __init__(self, cdcl, enabled=False, budget=PARAMS_PROBE_BUDGET, hbr_limit=PARAMS_PROBE_HBR_LIMIT):
+        self.cdcl = cdcl
+        self.budget = budget
+        self.hbr_limit = hbr_limit
+        self.rounds = 0
+        self.failed = 0
+        self.units = 0
+        self.hbrs = 0
+        if not enabled:
+            self.probe = self._nothing
+
+    def candidates(self):
+        """
+        Unassigned literals implying others through binary clauses, but implied by none.
+        Falls back on every literal with binary implications if the graph has no root.
+        """
+        binaries = self.cdcl.watchtable.binaries
+        values = self.cdcl.literals.lit_values
+        lits = [lit for v in range(1, self.cdcl.num_vars + 1) for lit in (v, -v)
+                if values[lit] == 0 and binaries[-lit]]
+        roots = [lit for lit in lits if not binaries[lit]]
+        return roots if roots else lits
+
+    def probe(self):
+        """
+        Run one probing round. Returns False if the formula is found UNSAT.
+        """
+        cdcl = self.cdcl
+        values = cdcl.literals.lit_values
+        if cdcl.level > 0:
+            cdcl.backtrack(0)
+        if not cdcl.bcp():
+            cdcl.unsat = True
+            return False
+        self.rounds += 1
+        budget = self.budget
+        hbrs = 0
+        clock = time.perf_counter
+        for p in self.candidates():
+            if budget <= 0 or clock() >= cdcl.deadline:
+                break
+            if values[p] != 0:
+                continue
+            implied, ok = self.propagate(p)
+            budget -= len(implied) + 1
+            if not ok:
+                self.failed += 1
+                if not self.add_unit(-p):
+                    return False
+                continue
+            resolvents = []
+            if hbrs < self.hbr_limit:
+                resolvents = self.hyper_binary_resolvents(p, implied, self.hbr_limit - hbrs)
+            cdcl.backtrack(0)
+            for r in resolvents:
+                cdcl.learn_clause(r)
+            hbrs += len(resolvents)
+
+            implied = set(implied)
+            other, ok = self.propagate(-p)
+            budget -= len(other) + 1
+            if not ok:
+                self.failed += 1
+                if not self.add_unit(p):
+                    return False
+                continue
+            both = [x for x in other if x in implied]
+            cdcl.backtrack(0)
+            proof = cdcl.proof
+            for x in both:
+                self.units += 1
+                proof.add([-p, x])
+                proof.add([p, x])
+                if not self.add_unit(x):
+                    return False
+                proof.delete([-p, x])
+                proof.delete([p, x])
+        self.hbrs += hbrs
+        return True
+
+    def hyper_binary_resolvents(self, p, implied, limit):
+        """
+        Returns at most limit hyper-binary resolvents of the literals implied by the probe p.
+        The implied literals form a tree rooted at p: a literal implied by a binary clause hangs from the
+          literal that implied it, a literal x implied by a long clause from the dominator d (lowest common
+          ancestor) of the other literals of the clause assigned by the probe, and (-d, x) is learned.
+        A long clause with a single such literal gives no resolvent: without its level-0 false literals
+          it is that binary clause already, as simplify() will find.
+        """
+        cdcl = self.cdcl
+        levels = cdcl.literals.levels
+        reasons = cdcl.literals.reasons
+        parent = {p: None}
+        depth = {p: 0}
+        resolvents = []
+        for x in implied:
+            r = reasons[abs(x)]
+            if r < 0:
+                dom = -binary_reason_literal(r)
+            else:
+                antecedents = [-lit for lit in cdcl.arena.literals(r) if lit != x and levels[abs(lit)] > 0]
+                dom = antecedents[0] if antecedents else p
+                for a in antecedents[1:]:
+                    dom = self.dominator(dom, a, parent, depth)
+                if len(antecedents) > 1:
+                    if len(resolvents) == limit:
+                        # The next resolvents would hang from binary clauses that are not learned
+                        break
+                    resolvents.append([x, -dom])
+            parent[x] = dom
+            depth[x] = depth[dom] + 1
+        return resolvents
+
+    @staticmethod
+    def dominator(a, b, parent, depth):
+        """
+        Lowest common ancestor of a and b in the implication tree.
+        """
+        while depth[a] > depth[b]:
+            a = parent[a]
+        while depth[b] > depth[a]:
+            b = parent[b]
+        while a != b:
+            a = parent[a]
+            b = parent[b]
+        return a
+
+    def propagate(self, lit):
+        """
+        Assign lit at a new level and propagate.
+        Returns the implied literals and False on conflict.
+        """
+        cdcl = self.cdcl
+        cdcl.assign(lit, None)
+        start = len(cdcl.trail.stack)
+        ok = cdcl.bcp()
+        implied = cdcl.trail.stack[start:]
+        if not ok:
+            cdcl.backtrack(0)
+        return implied, ok
+
+    def add_unit(self, lit):
+        """
+        Learn and propagate a unit at level 0. Returns False if the formula is found UNSAT.
+        """
+        cdcl = self.cdcl
+        value = cdcl.literals.lit_values[lit]
+        if value == 1:
+            return True
+        if value == 0:
+            cref = cdcl.learn_clause([lit])
+            cdcl.assign(lit, cref)
+            if cdcl.bcp():
+                return True
+        cdcl.unsat = True
+        return False
+
+    def _nothing(self, *args, **kwargs):
+        return True
@@ -0,0 +1,115 @@
+import os
+import signal
+import time
+from collections import defaultdict
+
+
+class Profiler:
+    """
+    Per-subsystem profiler. install() replaces the entry points of the solver and of its components
+      by timing wrappers on the instances themselves, so nothing is installed and nothing costs
+      when profiling is off.
+    For each entry point it counts the calls, the inclusive time and the self time (without the
+      wrapped calls it makes). The self time of each stack of wrapped calls is kept for flamegraphs.
+    """
+
+    def __init__(self):
+        self.entries = {}
+        self.stack = []
+        # Time spent in wrapped calls made by each open call of the stack
+        self.children = []
+        self.folded = defaultdict(float)
+        self.start = None
+
+    def targets(self, cdcl):
+        """
+        The (name, object, method) entry points to wrap.
+        """
+        for method in ("bcp", "analyze", "decide", "backtrack", "restart", "reduce", "simplify", "probe"):
+            yield method, cdcl, method
+        yield "subsumption", cdcl.subsumption_eliminator, "update_and_eliminate"
+        for d in cdcl.deciders:
+            for method in ("on_assign", "on_unassign", "on_unassign_all", "update_scores", "decide"):
+                yield f"{type(d).__name__}.{method}", d, method
+
+    def install(self, cdcl):
+        for name, obj, method in self.targets(cdcl):
+            setattr(obj, method, self.wrap(name, getattr(obj, method)))
+        self.start = time.perf_counter()
+
+    def wrap(self, name, func):
+        entry = self.entries.setdefault(name, [0, 0.0, 0.0])
+        stack = self.stack
+        children = self.children
+        folded = self.folded
+        clock = time.perf_counter
+
+        def wrapper(*args, **kwargs):
+            stack.append(name)
+            children.append(0.0)
+            start = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = clock() - start
+                own = elapsed - children.pop()
+                folded[";".join(stack)] += own
+                stack.pop()
+                entry[0] += 1
+                entry[1] += elapsed
+                entry[2] += own
+                if children:
+                    children[-1] += elapsed
+
+        return wrapper
+
+    def report(self):
+        total = time.perf_counter() - self.start
+        print(f"c {'subsystem':<28} {'calls':>10} {'total':>10} {'self':>10} {'self%':>7}")
+        for name, (calls, inclusive, own) in sorted(self.entries.items(), key=lambda e: -e[1][2]):
+            if calls:
+                print(f"c {name:<28} {calls:>10} {inclusive:>9.2f}s {own:>9.2f}s {100 * own / total:>6.1f}%")
+        own = sum(e[2] for e in self.entries.values())
+        print(f"c {'unwrapped':<28} {'':>10} {'':>10} {total - own:>9.2f}s {100 * (total - own) / total:>6.1f}%")
+
+    def write_folded(self, path):
+        """
+        Write the collapsed stacks, in microseconds of self time, e.g. for flamegraph.pl.
+        """
+        write_folded(path, {stack: int(t * 1e6) for stack, t in self.folded.items()})
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler sampling the Python stack on the SIGPROF timer (Unix only).
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.stacks = defaultdict(int)
+
+    def start(self):
+        signal.signal(signal.SIGPROF, self.sample)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+
+    def stop(self):
+        signal.setitimer(signal.ITIMER_PROF, 0, 0)
+        signal.signal(signal.SIGPROF, signal.SIG_DFL)
+
+    def sample(self, signum, frame):
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+            frame = frame.f_back
+        self.stacks[";".join(reversed(names))] += 1
+
+    def write_folded(self, path):
+        write_folded(path, self.stacks)
+
+
+def write_folded(path, stacks):
+    with open(path, "w") as f:
+        for stack, count in sorted(stacks.items()):
+            if count > 0:
+                f.write(f"{stack} {count}\n")
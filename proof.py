@@ -0,0 +1,97 @@
+import gzip
+
+from params import *
+
+
+class Proof:
+    """
+    DRAT proof of an UNSAT answer, checked with e.g. drat-trim against the original formula.
+    The solver logs each clause it adds before using it, and each clause it deletes.
+    In the binary format a step is 'a' or 'd', then each literal l as the variable-length integer
+      2 * l (l > 0) or -2 * l + 1 (l < 0) in 7-bit groups, low bits first, then a zero byte.
+    Steps are kept in a buffer written once it exceeds buffer_size bytes.
+    output is a path, gzip-compressed if it ends with .gz (a named pipe works as a path),
+      or an open binary file such as the stdin of a checker process. Without output nothing is logged.
+    """
+
+    def __init__(self, output=None, binary=PARAMS_PROOF_BINARY, buffer_size=PARAMS_PROOF_BUFFER):
+        self.enabled = output is not None
+        self.binary = binary
+        self.buffer_size = buffer_size
+        self.buffer = bytearray()
+        self.added = 0
+        self.deleted = 0
+        self.file = None
+        self.owned = False
+        if not self.enabled:
+            self.add = self._nothing
+            self.delete = self._nothing
+            self.flush = self._nothing
+            self.close = self._nothing
+        elif hasattr(output, "write"):
+            self.file = output
+        else:
+            self.owned = True
+            if output.endswith(".gz"):
+                self.file = gzip.open(output, "wb", compresslevel=PARAMS_PROOF_GZIP_LEVEL)
+            else:
+                self.file = open(output, "wb", buffering=0)
+        if self.enabled and not binary:
+            self.add = self.add_text
+            self.delete = self.delete_text
+
+    def add(self, clause):
+        self.added += 1
+        buffer = self.buffer
+        buffer.append(97)
+        for lit in clause:
+            u = 2 * lit if lit > 0 else -2 * lit + 1
+            while u > 127:
+                buffer.append(u & 127 | 128)
+                u >>= 7
+            buffer.append(u)
+        buffer.append(0)
+        if len(buffer) >= self.buffer_size:
+            self.flush()
+
+    def delete(self, clause):
+        self.deleted += 1
+        buffer = self.buffer
+        buffer.append(100)
+        for lit in clause:
+            u = 2 * lit if lit > 0 else -2 * lit + 1
+            while u > 127:
+                buffer.append(u & 127 | 128)
+                u >>= 7
+            buffer.append(u)
+        buffer.append(0)
+        if len(buffer) >= self.buffer_size:
+            self.flush()
+
+    def add_text(self, clause):
+        self.added += 1
+        self.buffer += " ".join([*map(str, clause), "0\n"]).encode()
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+    def delete_text(self, clause):
+        self.deleted += 1
+        self.buffer += " ".join(["d", *map(str, clause), "0\n"]).encode()
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        self.file.write(self.buffer)
+        self.file.flush()
+        self.buffer.clear()
+
+    def close(self):
+        """
+        Write the rest of the buffer, and close the output if it was opened here.
+        """
+        self.flush()
+        if self.owned:
+            self.file.close()
+
+    def _nothing(self, *args, **kwargs):
+        pass
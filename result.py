@@ -0,0 +1,24 @@
+class Result:
+    """
+    Answer of a solve() call: SAT with its model, UNSAT, or UNKNOWN when a budget ran out.
+    reason names the exhausted budget of an UNKNOWN answer.
+    """
+    SAT = "SAT"
+    UNSAT = "UNSAT"
+    UNKNOWN = "UNKNOWN"
+
+    # Exit codes of main.py, as in the SAT competition
+    EXIT_CODES = {SAT: 10, UNSAT: 20, UNKNOWN: 0}
+
+    def __init__(self, status, model=None, reason=None):
+        self.status = status
+        self.model = model
+        self.reason = reason
+
+    def exit_code(self):
+        return self.EXIT_CODES[self.status]
+
+    def __repr__(self):
+        if self.reason is not None:
+            return f"Result({self.status}, {self.reason})"
+        return f"Result({self.status})"
@@ -0,0 +1,111 @@
+import time
+
+from params import *
+
+
+class Statistics:
+    """
+    Counters and phase times of a solver run. The search counters (conflicts, decisions, propagations...)
+      live on the solver itself, this class keeps the others and reports them.
+    progress() prints a row of the progress table every `conflicts` conflicts or `seconds` seconds,
+      summary() returns the statistics of the run as a dict.
+    """
+
+    PHASES = ("parse", "preprocess", "probe", "bcp", "analyze", "reduce", "simplify")
+    COLUMNS = ("time", "conflicts", "decisions", "propagations", "restarts", "reduces",
+               "learnts", "glue", "props/s")
+    HEADER_EVERY = 20
+
+    def __init__(self, enabled=ENABLE_PROGRESS, conflicts=PARAMS_PROGRESS_CONFLICTS,
+                 seconds=PARAMS_PROGRESS_SECONDS):
+        self.start = time.perf_counter()
+        self.times = dict.fromkeys(self.PHASES, 0.0)
+        self.restarts = 0
+        self.learned = 0
+        self.glue_sum = 0
+        self.deleted = 0
+        self.collections = 0
+        # Sizes of the learned clause tiers after the last reduction
+        self.tiers = {"core": 0, "tier2": 0, "local": 0}
+        self.conflicts = conflicts
+        self.seconds = seconds
+        self.next_conflicts = conflicts
+        self.next_time = self.start + seconds
+        self.rows = 0
+        if not enabled:
+            self.progress = self._nothing
+
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    def average_glue(self):
+        return self.glue_sum / self.learned if self.learned else 0.0
+
+    def progress(self, cdcl):
+        """
+        Print a row of the progress table if it is due. Called on each conflict.
+        """
+        now = time.perf_counter()
+        if cdcl.conflicts < self.next_conflicts and now < self.next_time:
+            return
+        self.next_conflicts = cdcl.conflicts + self.conflicts
+        self.next_time = now + self.seconds
+        if self.rows % self.HEADER_EVERY == 0:
+            print("c " + " ".join(f"{c:>12}" for c in self.COLUMNS))
+        self.rows += 1
+        elapsed = now - self.start
+        row = (f"{elapsed:.1f}", cdcl.conflicts, cdcl.total_decisions, cdcl.propagations, self.restarts,
+               cdcl.reduces, len(cdcl.learnts), f"{self.average_glue():.2f}",
+               int(cdcl.propagations / elapsed) if elapsed > 0 else 0)
+        print("c " + " ".join(f"{x:>12}" for x in row))
+
+    def summary(self, cdcl):
+        """
+        Statistics of the run as a JSON-serializable dict.
+        """
+        elapsed = self.elapsed()
+        times = dict(self.times)
+        times["other"] = max(0.0, elapsed - sum(t for p, t in times.items() if p != "parse"))
+        return {
+            "time": elapsed,
+            "conflicts": cdcl.conflicts,
+            "decisions": cdcl.total_decisions,
+            "propagations": cdcl.propagations,
+            "restarts": self.restarts,
+            "reductions": cdcl.reduces,
+            "learned_clauses": self.learned,
+            "learned_literals": cdcl.learned_literals,
+            "minimized_literals": cdcl.removed_literals,
+            "average_glue": self.average_glue(),
+            "deleted_clauses": self.deleted,
+            "tiers": dict(self.tiers),
+            "simplify": {"rounds": cdcl.simplifies, "clauses": cdcl.simplified_clauses,
+                         "literals": cdcl.simplified_literals},
+            "probing": {"rounds": cdcl.prober.rounds, "failed": cdcl.prober.failed,
+                        "units": cdcl.prober.units, "hyper_binary": cdcl.prober.hbrs},
+            "arena": {"clauses": cdcl.arena.num_clauses, "bytes_per_clause": cdcl.arena.bytes_per_clause(),
+                      "collections": self.collections},
+            "times": times,
+        }
+
+    def print_summary(self, cdcl):
+        s = self.summary(cdcl)
+        rate = s["propagations"] / s["time"] if s["time"] > 0 else 0
+        print(f"c conflicts:    {s['conflicts']}")
+        print(f"c decisions:    {s['decisions']}")
+        print(f"c propagations: {s['propagations']} ({rate:.0f}/s)")
+        print(f"c restarts:     {s['restarts']}")
+        print(f"c learned:      {s['learned_clauses']} clauses, average glue {s['average_glue']:.2f},",
+              f"minimization removed {s['minimized_literals']} of {s['learned_literals']} literals")
+        print(f"c reductions:   {s['reductions']}, deleted {s['deleted_clauses']} clauses,",
+              ", ".join(f"{tier} {n}" for tier, n in s["tiers"].items()))
+        print(f"c simplify:     {s['simplify']['rounds']} rounds removed {s['simplify']['clauses']} clauses",
+              f"and {s['simplify']['literals']} false literals")
+        print(f"c probing:      {s['probing']['failed']} failed literals, {s['probing']['units']} units,",
+              f"{s['probing']['hyper_binary']} hyper-binary resolvents")
+        print(f"c clause arena: {s['arena']['clauses']} clauses, {s['arena']['bytes_per_clause']:.1f} bytes/clause,",
+              f"{s['arena']['collections']} collections")
+        print("c times:       ", ", ".join(f"{phase} {t:.2f}s" for phase, t in s["times"].items()))
+
+    def _nothing(self, *args, **kwargs):
+        pass
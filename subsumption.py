@@ -7,32 +7,45 @@ class SubsumptionEliminator:
         else:
             self.update_and_eliminate = self._nothing
             self.remove_appearance = self._nothing
+            self.add_appearance = self._nothing
+            self.relocate = self._nothing
 
     def count_appearance(self):
         num_vars = self.cdcl.num_vars
+        arena = self.cdcl.arena
         for i in range(1, num_vars + 1):
             self.appearance[i] = set()
             self.appearance[-i] = set()
         for c in self.cdcl.clauses:
-            for lit in c.literals:
+            for lit in arena.literals(c):
                 self.appearance[lit].add(c)
 
     def update_and_eliminate(self, new_clause):
-        c = new_clause.literals
+        arena = self.cdcl.arena
+        c = arena.literals(new_clause)
         subsumed = self.appearance[c[0]].copy()
         for lit in c:
             subsumed.intersection_update(self.appearance[lit])
             self.appearance[lit].add(new_clause)
         if len(subsumed) > 0:
             for sc in subsumed:
-                #print(sc.literals, new_clause.literals)
-                # assert(set(new_clause.literals).issubset(set(sc.literals)))
-                sc.subsumed_by(new_clause)
+                arena.subsumed_by(sc, new_clause)
                 self.cdcl.eliminate_clause(sc)
 
+    def add_appearance(self, clause):
+        for lit in self.cdcl.arena.literals(clause):
+            self.appearance[lit].add(clause)
+
     def remove_appearance(self, clause):
-        for lit in clause.literals:
+        for lit in self.cdcl.arena.literals(clause):
             self.appearance[lit].remove(clause)
 
+    def relocate(self, relocation):
+        """
+        Rewrite clause references after the arena is compacted.
+        """
+        for lit, crefs in self.appearance.items():
+            self.appearance[lit] = {relocation[c] for c in crefs}
+
     def _nothing(self, *args, **kwargs):
         pass
@@ -0,0 +1,49 @@
+import contextlib
+import io
+
+from cdcl import CDCL
+from result import Result
+
+
+def solver(clauses, num_vars):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return CDCL(clauses, num_vars, frozen=range(1, num_vars + 1))
+
+
+def solve(cdcl, assumptions=()):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return cdcl.solve(assumptions)
+
+
+def test_units_added_between_calls_are_propagated():
+    # The added units fill the trail, [-1, -2] is only violated once they are propagated
+    cdcl = solver([[1, 2], [-1, -2], [2, 3]], 3)
+    assert solve(cdcl).status == Result.SAT
+    assert cdcl.add_clause([1])
+    cdcl.add_clause([2])
+    cdcl.add_clause([3])
+    assert solve(cdcl).status == Result.UNSAT
+
+
+def test_added_clauses_constrain_the_model():
+    cdcl = solver([[1, 2, 3], [-1, 4], [-2, 4]], 4)
+    assert solve(cdcl).status == Result.SAT
+    cdcl.add_clause([-4])
+    assert solve(cdcl).status == Result.SAT
+    assert cdcl.val(3) == 3 and cdcl.val(1) == -1 and cdcl.val(2) == -2
+    cdcl.add_clause([-3, 1])
+    assert solve(cdcl).status == Result.UNSAT
+
+
+def test_assumptions():
+    cdcl = solver([[-1, 2], [-2, 3], [-3, -4]], 4)
+    assert solve(cdcl, [1, 4]).status == Result.UNSAT
+    assert cdcl.failed(1) and cdcl.failed(4)
+    res = solve(cdcl, [1])
+    assert res.status == Result.SAT
+    assert cdcl.val(3) == 3 and cdcl.val(4) == -4
+    # Assumptions only hold for one call
+    cdcl.assume(4)
+    assert solve(cdcl).status == Result.SAT
+    assert cdcl.val(1) == -1
+    assert solve(cdcl, [1]).status == Result.SAT
@@ -0,0 +1,55 @@
+import contextlib
+import copy
+import io
+
+from cdcl import CDCL
+from params import PARAMS_SHARE_SIZE
+from portfolio import ClauseExchange
+from result import Result
+
+
+def exchange_pair(capacity):
+    writer = ClauseExchange(2, 10, capacity)
+    reader = copy.copy(writer)
+    writer.attach(0)
+    reader.attach(1)
+    return writer, reader
+
+
+def test_receive():
+    writer, reader = exchange_pair(64)
+    writer.export([1, -2])
+    writer.export([3])
+    assert reader.receive() == [[1, -2], [3]]
+    assert reader.receive() == []
+
+
+def test_lapped_reader_drops_clauses():
+    capacity = 4 * (PARAMS_SHARE_SIZE + 1)
+    writer, reader = exchange_pair(capacity)
+    # A write in progress past the head could reach the slots of the reader
+    while writer.heads[0] <= capacity - (PARAMS_SHARE_SIZE + 1):
+        writer.export([1, 2])
+    assert reader.receive() == []
+
+
+def test_corrupted_record():
+    writer, reader = exchange_pair(64)
+    writer.export([1, 2])
+    writer.views[0][1] = 11
+    assert reader.receive() == []
+
+
+def test_imported_units_are_propagated():
+    writer, reader = exchange_pair(64)
+    with contextlib.redirect_stdout(io.StringIO()):
+        cdcl = CDCL([[1, 2], [-1, -2], [2, 3]], 3, frozen=range(1, 4))
+        cdcl.exchange = reader
+        assert cdcl.solve().status == Result.SAT
+        # Workers only share implied clauses, these units are an unsatisfiable import for the test
+        for unit in ([1], [2], [3]):
+            writer.export(unit)
+        cdcl.backtrack(0)
+        cdcl.import_clauses()
+        assert cdcl.imported == 3
+        assert cdcl.solve().status == Result.UNSAT
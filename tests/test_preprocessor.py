@@ -0,0 +1,22 @@
+import contextlib
+import io
+
+import preprocessor
+
+
+def preprocessed(clauses, num_vars, deadline):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return preprocessor.preprocess(clauses, num_vars, deadline=deadline)
+
+
+def test_stops_at_deadline():
+    # [1, 2] subsumes [1, 2, 3], and 3 could be eliminated
+    clauses = [[1, 2], [1, 2, 3], [-3, 4], [3, -4, 1]]
+    kept, elimination_stack = preprocessed(clauses, 4, deadline=0.0)
+    assert sorted(map(sorted, kept)) == sorted(map(sorted, clauses))
+    assert len(elimination_stack) == 0
+
+
+def test_runs_without_deadline():
+    kept, _ = preprocessed([[1, 2], [1, 2, 3], [-3, 4], [3, -4, 1]], 4, deadline=float("inf"))
+    assert [1, 2, 3] not in kept
@@ -0,0 +1,23 @@
+import contextlib
+import io
+
+from cdcl import CDCL
+
+
+def probed(clauses, num_vars):
+    with contextlib.redirect_stdout(io.StringIO()):
+        cdcl = CDCL(clauses, num_vars, frozen=range(1, num_vars + 1))
+    assert cdcl.solve_unary_lits() and cdcl.probe()
+    return cdcl, [sorted(cdcl.arena.literals(c)) for c in cdcl.learnts]
+
+
+def test_resolvent_on_dominator():
+    # 1 -> 2 -> 3, 2 -> 4, and 3, 4 imply 5: the dominator of 3 and 4 is 2
+    cdcl, learnts = probed([[-1, 2], [-2, 3], [-2, 4], [-3, -4, 5]], 5)
+    assert learnts == [[-2, 5]]
+    assert cdcl.prober.hbrs == 1
+
+
+def test_no_resolvent_for_binary_implications():
+    _, learnts = probed([[-1, 2], [-2, 3], [-3, 4]], 4)
+    assert learnts == []
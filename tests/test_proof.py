@@ -0,0 +1,32 @@
+import io
+
+from proof import Proof
+
+
+def test_disabled_text_proof_keeps_no_buffer():
+    proof = Proof(binary=False)
+    proof.add([1, -2])
+    proof.delete([1, -2])
+    proof.flush()
+    assert proof.buffer == bytearray()
+    assert proof.added == proof.deleted == 0
+
+
+def test_binary_encoding():
+    out = io.BytesIO()
+    proof = Proof(out)
+    proof.add([1, -64])
+    proof.delete([2])
+    proof.close()
+    # 2 * 1, -2 * -64 + 1 = 129 as two 7-bit groups
+    assert out.getvalue() == bytes([97, 2, 129, 1, 0, 100, 4, 0])
+
+
+def test_text_format():
+    out = io.BytesIO()
+    proof = Proof(out, binary=False)
+    proof.add([1, -2])
+    proof.delete([1, -2])
+    proof.add([])
+    proof.close()
+    assert out.getvalue() == b"1 -2 0\nd 1 -2 0\n0\n"
@@ -0,0 +1,24 @@
+from io import BytesIO
+
+import pytest
+
+from utils import parse_cnf, read_cnf
+
+CNF = b"c a comment line\np cnf 3 2\nc another comment\n1 -2 0\nc and a last one\n2 3 0\n"
+
+
+def test_trailing_whitespace():
+    assert read_cnf(BytesIO(b"p cnf 2 1\n1 2 0\n  ")) == ([[1, 2]], 2)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 7, 16, 1 << 24])
+def test_chunk_size(chunk_size):
+    literals, offsets, num_vars = parse_cnf(BytesIO(CNF), chunk_size)
+    assert literals.tolist() == [1, -2, 2, 3]
+    assert offsets.tolist() == [0, 2, 4]
+    assert num_vars == 3
+
+
+def test_clause_count_mismatch():
+    with pytest.raises(ValueError):
+        read_cnf(BytesIO(b"p cnf 2 2\n1 2 0\n"))
@@ -3,12 +3,14 @@ class Trail:
     Static class for managing the assignment trail.
     Using a manager class is due to consideration of keeping consistency between assignment, trail and VSIDS score.
     The solver uses push() to assign a value, and backtrack() to revoke assignments.
+    trail_lim[k] is the position of the decision that opened level k + 1,
+      qhead is the position of the next assignment to propagate.
     """
 
     def __init__(self):
         self.stack = []
-        self.bcp_ptr = 0
-        self.first_bcp = True
+        self.trail_lim = []
+        self.qhead = 0
 
     def push(self, literal):
         """
@@ -16,25 +18,40 @@ class Trail:
         """
         self.stack.append(literal)
 
-    def start_bcp(self):
-        if not self.first_bcp:
-            self.bcp_ptr = len(self.stack) - 1
-        else:
-            self.first_bcp = False
-            self.bcp_ptr = 0
+    def new_level(self):
+        """
+        Mark the start of a new decision level at the top of the stack.
+        """
+        self.trail_lim.append(len(self.stack))
+
+    def level(self):
+        return len(self.trail_lim)
+
+    def backtrack(self, level):
+        """
+        Remove all assignments above the given level.
+        Returns the removed literals, the most recent one first.
+        """
+        if level >= len(self.trail_lim):
+            return []
+        pos = self.trail_lim[level]
+        undone = self.stack[pos:]
+        undone.reverse()
+        del self.stack[pos:]
+        del self.trail_lim[level:]
+        if self.qhead > pos:
+            self.qhead = pos
+        return undone
 
     def next(self):
         """
         Move BCP pointer forward.
         """
-        if self.bcp_ptr < len(self.stack) and self.bcp_ptr >= 0:
-            ret = self.stack[self.bcp_ptr]
-            self.bcp_ptr += 1
+        if self.qhead < len(self.stack):
+            ret = self.stack[self.qhead]
+            self.qhead += 1
             return ret
         return None
 
     def len(self):
         return len(self.stack)
-
-    def toDict(self, literals):
-        return {abs(var): (literals.get(var) > 0) for var in self.stack}
@@ -1,17 +1,155 @@
-def read_cnf(fp):
-    sentence = []
-
-    for line in fp:
-        if line.startswith('c'):
-            continue
-        if line.startswith('p'):
-            line = line.split()
-            num_vars, num_clauses = int(line[2]), int(line[3])
+import bz2
+import gzip
+import lzma
+import multiprocessing
+import os
+import sys
+
+import numpy as np
+
+# Bytes read from the input per chunk
+CHUNK_SIZE = 1 << 24
+# Bytes buffered by the model writer, literals per 'v' line
+WRITE_BUFFER = 1 << 20
+MODEL_LINE = 20
+
+OPENERS = {
+    ".gz": gzip.open,
+    ".bz2": bz2.open,
+    ".xz": lzma.open,
+    ".lzma": lzma.open,
+}
+
+
+def open_cnf(path):
+    """
+    Open a DIMACS file for binary reading, transparently decompressing .gz, .bz2, .xz and .lzma files.
+    """
+    for ext, opener in OPENERS.items():
+        if path.endswith(ext):
+            return opener(path, "rb")
+    return open(path, "rb")
+
+
+def strip_special_lines(chunk, header):
+    """
+    Remove comment, header and SATLIB end of formula ('%') lines from a chunk.
+    Clause lines only contain digits, signs and spaces, so any 'c', 'p' or '%' byte belongs to such a line.
+    Returns (chunk, header, end), end is True if the end of formula marker was found.
+    """
+    pieces = []
+    pos = 0
+    marks = [chunk.find(ch) for ch in (b"c", b"p", b"%")]
+    while True:
+        found = [m for m in marks if m >= 0]
+        if not found:
+            break
+        i = min(found)
+        start = chunk.rfind(b"\n", 0, i) + 1
+        stop = chunk.find(b"\n", i)
+        if stop < 0:
+            stop = len(chunk)
+        pieces.append(chunk[pos:start])
+        pos = stop
+        kind = chunk[i:i + 1]
+        if kind == b"p":
+            header = chunk[i:stop].split()
+        elif kind == b"%":
+            return b"".join(pieces), header, True
+        marks = [m if m < 0 or m >= stop else chunk.find(ch, stop)
+                 for m, ch in zip(marks, (b"c", b"p", b"%"))]
+    if pieces:
+        pieces.append(chunk[pos:])
+        chunk = b"".join(pieces)
+    return chunk, header, False
+
+
+def parse_cnf(fp, chunk_size=CHUNK_SIZE):
+    """
+    Parse a DIMACS CNF from a binary file object.
+    The input is read in large chunks cut at line boundaries and tokenized by NumPy,
+      so a clause may span several lines.
+    Returns (literals, offsets, num_vars): the literals of all clauses in one int32 array,
+      clause i being literals[offsets[i]:offsets[i + 1]].
+    """
+    header = None
+    tokens = []
+    rest = b""
+    done = False
+    while not done:
+        chunk = fp.read(chunk_size)
+        if chunk:
+            chunk = rest + chunk
+            cut = chunk.rfind(b"\n") + 1
+            chunk, rest = chunk[:cut], chunk[cut:]
         else:
-            line = line.split()
-            clause = [int(x) for x in line[:-1]]
-            sentence.append(clause)
+            chunk, rest = rest, b""
+            done = True
+        chunk, header, end = strip_special_lines(chunk, header)
+        done = done or end
+        # NumPy reads a blank chunk (comments only, trailing spaces) as a single 0, which would end a clause
+        if chunk.strip():
+            tokens.append(np.fromstring(chunk, dtype=np.int32, sep=" "))
+
+    if header is None:
+        raise ValueError("missing 'p cnf' header")
+    num_vars, num_clauses = int(header[2]), int(header[3])
+
+    tokens = np.concatenate(tokens) if tokens else np.zeros(0, dtype=np.int32)
+    if tokens.size > 0 and tokens[-1] != 0:
+        tokens = np.append(tokens, np.int32(0))
+    ends = np.flatnonzero(tokens == 0)
+    literals = tokens[tokens != 0]
+    offsets = np.zeros(len(ends) + 1, dtype=np.int64)
+    # The i-th terminating zero is preceded by i other zeros.
+    offsets[1:] = ends - np.arange(len(ends))
+
+    if len(ends) != num_clauses:
+        raise ValueError(f"the header announces {num_clauses} clauses, found {len(ends)}")
+
+    return literals, offsets, num_vars
+
+
+def read_cnf(fp):
+    literals, offsets, num_vars = parse_cnf(fp)
+    return to_sentence(literals, offsets), num_vars
+
+
+def to_sentence(literals, offsets):
+    """
+    Split flat literals and offsets into a list of clauses.
+    """
+    literals = literals.tolist()
+    offsets = offsets.tolist()
+    return [literals[offsets[i]:offsets[i + 1]]
+            for i in range(len(offsets) - 1)]
+
+
+def write_model(path, model):
+    """
+    Write the model in the DIMACS output format: an 's SATISFIABLE' line, then 'v' lines
+      of MODEL_LINE literals ending with 'v 0'.
+    """
+    lits = np.arange(len(model), dtype=np.int64)[1:] * model[1:]
+    tokens = list(map(str, lits.tolist()))
+    with open(path, "w", buffering=WRITE_BUFFER) as f:
+        f.write("s SATISFIABLE\n")
+        for i in range(0, len(tokens), MODEL_LINE):
+            f.write("v " + " ".join(tokens[i:i + MODEL_LINE]) + "\n")
+        f.write("v 0\n")
+
+
+def worker_context():
+    """
+    Multiprocessing context of the worker processes: fork where available,
+      so that workers start with the imports and the data of the main process.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("fork" if "fork" in methods else None)
 
-    assert len(sentence) == num_clauses
 
-    return sentence, num_vars
+def silence_worker():
+    """
+    Discard the output of a worker process, only the main process reports.
+    """
+    sys.stdout = open(os.devnull, "w")
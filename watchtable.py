@@ -1,78 +1,90 @@
+from clause import DELETED, FLAGS, HEADER_SIZE, SIZE
+
+
 class WatchTable:
     """
     Static class for managing literal watch.
-    Considering consistency of l2c and c2l,
-      using a static class to handle that seems to be better than manually keeping consistency in the solver logic.
+    The two watched literals of a clause are always kept at positions 0 and 1 of the clause,
+      so a clause does not need to remember which literals it watches.
+    watches[lit] is a flat list of (clause reference, blocker literal) pairs of clauses watching lit.
+    The blocker is another literal of the clause; if it is TRUE the clause need not be visited.
+    Binary clauses are not watched: binaries[lit] lists the literals implied when lit becomes FALSE.
     """
 
-    def __init__(self, clauses, num_vars):
+    def __init__(self, arena, clauses, num_vars):
         """
-        Initialize watch with the first one or two literals.
+        Initialize watch with the first two literals.
         """
-        self.l2c_watch = [[] for _ in range(2 * num_vars + 1)]
-        self.c2l_watch = {}
-        for clause in clauses:
-            if len(clause) > 1:
-                self.c2l_watch[clause] = [
-                    clause.literals[0], clause.literals[1]]
-                self.l2c_watch[clause.literals[0]].append(clause)
-                self.l2c_watch[clause.literals[1]].append(clause)
-            # else:
-            #     # assert len(clause) == 1
-            #     self.c2l_watch[clause] = [clause.literals[0], None]
-            #     self.l2c_watch[clause.literals[0]].append(clause)
-            # we directly assign unary lits and do not watch them.
-
-    def l2c(self, literal):
-        return self.l2c_watch[literal]
-
-    def c2l(self, clause):
-        return self.c2l_watch[clause]
-
-    def update(self, clause, assigned_lit, literals):
-        other = self.get_other_watch(clause, assigned_lit)
+        self.arena = arena
+        self.watches = [[] for _ in range(2 * num_vars + 1)]
+        self.binaries = [[] for _ in range(2 * num_vars + 1)]
+        for cref in clauses:
+            self.attach(cref)
 
-        # if other == None:
-        #     return False
+    def attach(self, cref):
+        """
+        Watch the literals at position 0 and 1 of the clause.
+        """
+        data = self.arena.data
+        # we directly assign unary lits and do not watch them.
+        if data[cref + SIZE] < 2:
+            return
+        w0 = data[cref + HEADER_SIZE]
+        w1 = data[cref + HEADER_SIZE + 1]
+        if data[cref + SIZE] == 2:
+            self.binaries[w0].append(w1)
+            self.binaries[w1].append(w0)
+            return
+        self.watches[w0] += (cref, w1)
+        self.watches[w1] += (cref, w0)
 
-        # Find unassigned literal or satisfied literal
-        for lit in clause.literals:
-            if lit == assigned_lit or lit == other:
-                continue
-            # This literal satisfies the clause or is not assigned
-            if literals.sat(lit) or literals.get(lit) == 0:
-                c2l = self.c2l_watch[clause]
-                # assert lit_old in c2l
-                # assert lit_new not in c2l
-                c2l.remove(assigned_lit)
-                c2l.append(lit)
-                self.l2c_watch[assigned_lit].remove(clause)
-                self.l2c_watch[lit].append(clause)
-                return True
-        # Cann't find a literal to watch
-        return False
+    def detach(self, cref):
+        data = self.arena.data
+        if data[cref + SIZE] < 2:
+            return
+        w0 = data[cref + HEADER_SIZE]
+        w1 = data[cref + HEADER_SIZE + 1]
+        if data[cref + SIZE] == 2:
+            self.binaries[w0].remove(w1)
+            self.binaries[w1].remove(w0)
+            return
+        for lit in (w0, w1):
+            ws = self.watches[lit]
+            for i in range(0, len(ws), 2):
+                if ws[i] == cref:
+                    del ws[i:i + 2]
+                    break
 
-    def append(self, clause, literals):
+    def rebuild(self, clauses):
         """
-        Append LEARNED clause to the watch table.
+        Clear all watches and binary implications, and attach the given clauses again.
         """
-        # assert len(clause) > 0
-        # We watch the two deepest literals.
-        # When backtrack happens, they are the first literals to be unassigned in the clause.
-        # Then they can be included in the BCP process.
-        d1_lit, d2_lit = clause.deepest_literals(literals)
-        self.c2l_watch[clause] = [d1_lit, d2_lit]
-        self.l2c_watch[d1_lit].append(clause)
-        if d2_lit != None:
-            self.l2c_watch[d2_lit].append(clause)
+        for ws in self.watches:
+            del ws[:]
+        for bs in self.binaries:
+            del bs[:]
+        for cref in clauses:
+            self.attach(cref)
 
-    def sat(self, clause, literals):
+    def sweep(self):
         """
-        Returns True if the clause is satisfied by assignment on watched literals.
+        Drop the watches of clauses marked as deleted, one pass over all watch lists.
         """
-        watch = self.c2l(clause)
-        return literals.sat(watch[0]) or literals.sat(watch[1])
+        data = self.arena.data
+        for ws in self.watches:
+            j = 0
+            for i in range(0, len(ws), 2):
+                cref = ws[i]
+                if not data[cref + FLAGS] & DELETED:
+                    ws[j] = cref
+                    ws[j + 1] = ws[i + 1]
+                    j += 2
+            del ws[j:]
 
-    def get_other_watch(self, clause, lit):
-        watch = self.c2l(clause)
-        return watch[1] if watch[0] == lit else watch[0]
+    def relocate(self, relocation):
+        """
+        Rewrite clause references after the arena is compacted.
+        """
+        for ws in self.watches:
+            for i in range(0, len(ws), 2):
+                ws[i] = relocation[ws[i]]